@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+
+''' bench.py -- benchmarks for the hot paths of blackjack.py
+    Times hand scoring, deck handling, card rendering, a scripted round through
+    main() and headless rounds through playRound(), reporting ops/sec, per-op
+    latency percentiles and peak memory. Use --json FILE to save the results
+    for diffing between releases.
+'''
+
+import argparse
+import contextlib
+import io
+import itertools
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+import blackjack
+
+try:
+    import simulate
+except ImportError: # NumPy is not installed; skip the batch benchmarks
+    simulate = None
+
+# Constants
+
+SCRIPT_SEED = 0 # Deals a first round without naturals or an ace upcard, so the script needs no insurance answer
+
+# Classes
+
+class HitBelow17(blackjack.Player):
+    '''Headless player that hits below 17 and never doubles down or splits.'''
+    def move(self, userHand, dealerHand, canDouble, canSplit, canSurrender):
+        return 'H' if userHand.value < 17 else 'S'
+
+# Functions - benchmark cases
+
+def scriptedSession():
+    '''Play one round through main() with scripted input, discarding the output.'''
+    # Every prompt after the move accepts anything, so the trailing QUITs cover
+    # however many times the dealer hits and then end the session at the next bet.
+    script = 'Bench\n100\n10\nS\n' + 'QUIT\n' * 30
+    stdin = sys.stdin
+    sys.stdin = io.StringIO(script)
+    state = random.getstate()
+    random.seed(SCRIPT_SEED) # main() shuffles with the random module
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            blackjack.main()
+    except SystemExit:
+        pass
+    finally:
+        sys.stdin = stdin
+        random.setstate(state)
+
+def benchmarkCases():
+    '''Return (name, setup) pairs; each setup returns the zero-argument function to time.'''
+    def handValue():
+        hands = [random.sample(blackjack.CARDS, random.randint(2, 5)) for _ in range(1000)]
+        cycle = itertools.cycle(hands)
+        return lambda: blackjack.handValue(next(cycle))
+
+    def handAppend():
+        cards = blackjack.CARDS
+        return lambda: blackjack.Hand((cards[0], cards[12], cards[20])).value
+
+    def deckConstruct():
+        return blackjack.DeckofCards
+
+    def deckDealDiscard():
+        deck = blackjack.DeckofCards()
+        return lambda: deck.discard([deck.deal(), deck.deal(), deck.deal(), deck.deal()])
+
+    def shoeDealDiscard():
+        shoe = blackjack.Shoe()
+        return lambda: shoe.discard([shoe.deal(), shoe.deal(), shoe.deal(), shoe.deal()])
+
+    def cardDisplay():
+        card = blackjack.CARDS[11]
+        return card.display
+
+    def displayCards():
+        dealerHand = blackjack.Hand(blackjack.CARDS[0:3])
+        userHand = blackjack.Hand(blackjack.CARDS[20:23])
+        def render():
+            with contextlib.redirect_stdout(io.StringIO()):
+                blackjack.displayCards(dealerHand, userHand, False)
+        return render
+
+    def scriptedRound():
+        return scriptedSession
+
+    def headlessRound():
+        shoe = blackjack.Shoe()
+        player = HitBelow17()
+        def play():
+            result = blackjack.playRound(shoe, 100, player)
+            shoe.discard(result.dealerHand + [card for hand in result.userHands for card in hand])
+        return play
+
+    cases = [
+        ('handValue', handValue),
+        ('Hand.append', handAppend),
+        ('DeckofCards()', deckConstruct),
+        ('DeckofCards.deal/discard', deckDealDiscard),
+        ('Shoe.deal/discard', shoeDealDiscard),
+        ('PokerCard.display', cardDisplay),
+        ('displayCards', displayCards),
+        ('main() scripted round', scriptedRound),
+        ('playRound headless', headlessRound),
+    ]
+    if simulate is not None:
+        def batchRound():
+            rng = simulate.np.random.default_rng(0)
+            shoes = simulate.shuffledShoes(rng, 10_000, blackjack.NUM_DECKS)
+            return lambda: simulate.playBatch(shoes)
+        cases.append(('playBatch (10,000 rounds)', batchRound))
+
+        def dealerPlay():
+            rng = simulate.np.random.default_rng(0)
+            shoes = simulate.shuffledShoes(rng, 10_000, blackjack.NUM_DECKS)
+            upcards = simulate.TRANSITION[blackjack.START_STATE, shoes[:, 0]]
+            return lambda: simulate.playDealer(shoes, simulate.np.ones(len(shoes), dtype=simulate.np.intp), upcards.copy())
+        cases.append(('playDealer (10,000 hands)', dealerPlay))
+
+        def batchShuffle():
+            rng = simulate.np.random.default_rng(0)
+            return lambda: simulate.shuffledShoes(rng, 10_000, blackjack.NUM_DECKS)
+        cases.append(('shuffledShoes (10,000 shoes)', batchShuffle))
+    return cases
+
+# Functions - measurement
+
+def percentile(sortedValues, fraction):
+    '''Nearest-rank percentile of an already sorted list.'''
+    return sortedValues[min(len(sortedValues) - 1, int(fraction * len(sortedValues)))]
+
+def measure(function, minTime=0.2, samples=50):
+    '''Time a function and return its ops/sec, latency percentiles (ns) and peak memory (bytes).'''
+    # Calibrate how many calls go in one sample so that timer overhead is negligible
+    number = 1
+    while True:
+        start = time.perf_counter_ns()
+        for _ in range(number):
+            function()
+        if time.perf_counter_ns() - start >= minTime * 1e9 / samples:
+            break
+        number *= 2
+
+    latencies = []
+    for _ in range(samples):
+        start = time.perf_counter_ns()
+        for _ in range(number):
+            function()
+        latencies.append((time.perf_counter_ns() - start) / number)
+    latencies.sort()
+
+    # Peak memory is measured in a separate pass since tracing slows everything down
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    for _ in range(number):
+        function()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {
+        'opsPerSec': 1e9 / (sum(latencies) / len(latencies)),
+        'p50': percentile(latencies, 0.50),
+        'p90': percentile(latencies, 0.90),
+        'p99': percentile(latencies, 0.99),
+        'peakMemory': peak,
+        'callsPerSample': number,
+    }
+
+def runBenchmarks(selected=None, minTime=0.2):
+    '''Run every benchmark (or those whose names contain a selected string) and return the report.'''
+    random.seed(0)
+    results = {}
+    for name, setup in benchmarkCases():
+        if selected and not any(text in name for text in selected):
+            continue
+        results[name] = measure(setup(), minTime)
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': results,
+    }
+
+def printReport(report):
+    print(f'{"BENCHMARK":<28}{"OPS/SEC":>14}{"P50":>12}{"P90":>12}{"P99":>12}{"PEAK MEM":>12}')
+    for name, result in report['results'].items():
+        latencies = ''.join(f'{result[key] / 1000:>10.2f}us' for key in ('p50', 'p90', 'p99'))
+        print(f'{name:<28}{result["opsPerSec"]:>14,.0f}{latencies}{result["peakMemory"] / 1024:>10.1f}KB')
+
+# Main Execution
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the blackjack hot paths.')
+    parser.add_argument('names', nargs='*', help='only run benchmarks whose names contain one of these')
+    parser.add_argument('--json', metavar='FILE', help='also write the results to FILE as JSON')
+    parser.add_argument('--time', type=float, default=0.2, help='seconds to spend timing each benchmark')
+    args = parser.parse_args()
+
+    report = runBenchmarks(args.names, args.time)
+    printReport(report)
+    if args.json:
+        with open(args.json, 'w') as file:
+            json.dump(report, file, indent=2)
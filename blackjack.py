@@ -7,8 +7,10 @@
 '''
 
 import dataclasses
+import decimal
 import random
 import sys
+from array import array
 from collections import deque
 
 # Constants - card suits
@@ -17,27 +19,76 @@ HEARTS      = chr(9829) # Character 9829 is '♥'
 DIAMONDS    = chr(9830) # Character 9830 is '♦'
 SPADES      = chr(9824) # Character 9824 is '♠'
 CLUBS       = chr(9827) # Character 9827 is '♣'
+SUITS       = (HEARTS, DIAMONDS, SPADES, CLUBS)
+
+# Constants - integer card codes
+# A card code is suit index * 13 + rank, where rank 0 is a '2' and rank 12 is an ace,
+# so every card fits in a single byte and a deck is simply array('B', range(52)).
+
+SUIT_INDEX  = {suit: index for index, suit in enumerate(SUITS)}
+CODE_VALUE  = tuple(code % 13 + 2 for code in range(52))           # PokerCard.value of each code
+CODE_POINTS = bytes(min(10, value) if value != 14 else 1 for value in CODE_VALUE) # Aces count 1 here
+ACE_RANK    = 12
+
+# Constants - hand state machine
+# Every hand collapses to a state of hard total (aces as 1) * 2 + 1 if it holds an ace,
+# plus a single absorbing bust state. HAND_TRANSITION[state * 52 + code] is the state
+# after drawing a card, and STATE_VALUE/STATE_SOFT give the blackjack total (22 for any
+# bust) and soft flag of each state, so a hand is scored with one lookup per card.
+
+START_STATE  = 0
+BUST_STATE   = 44
+NUM_STATES   = 45
+HAND_TRANSITION = bytes(
+    BUST_STATE if state == BUST_STATE or state // 2 + CODE_POINTS[code] > 21
+    else (state // 2 + CODE_POINTS[code]) * 2 + (state % 2 or code % 13 == ACE_RANK)
+    for state in range(NUM_STATES) for code in range(52))
+STATE_SOFT  = bytes(state != BUST_STATE and state % 2 == 1 and state // 2 <= 11 for state in range(NUM_STATES))
+STATE_VALUE = bytes(22 if state == BUST_STATE else state // 2 + 10 * STATE_SOFT[state] for state in range(NUM_STATES))
+
+# Constants - table setup
+
+NUM_DECKS       = 6
+PENETRATION     = 0.75 # Share of the shoe dealt before the cut card comes out
+MAX_ROUND_CARDS = 32   # Cards kept behind the cut card; rounds practically never need more, even split
+MIN_BET         = 50   # In cents, like every amount of money in the game
+MAX_DEPOSIT     = 100_000_000 # The most a player can bring to the table or add at once ($1,000,000)
+
+INSURANCE_PAYS  = 2    # Insurance pays 2 to 1 and costs up to half the bet
 
 # Classes
 
 class PokerCard:
+    '''An immutable playing card. Only one instance exists per suit and value,
+    shared by every deck and table, so PokerCard(HEARTS, 5) is PokerCard(HEARTS, 5).
+    Whether a card is face down belongs to the hand holding it, not to the card.
+    '''
+    __slots__ = ('suit', 'value', 'code')
     VALUE = {
         11: 'J',
         12: 'Q',
         13: 'K',
         14: 'A',
     }
+    _interned = {}
 
-    def __init__(self, suit, value):
-        self.suit = suit
-        self.value = value
-        self.backside = False
+    def __new__(cls, suit, value):
+        card = cls._interned.get((suit, value))
+        if card is None:
+            card = super().__new__(cls)
+            object.__setattr__(card, 'suit', suit)
+            object.__setattr__(card, 'value', value)
+            object.__setattr__(card, 'code', SUIT_INDEX[suit] * 13 + value - 2)
+            cls._interned[(suit, value)] = card
+        return card
 
-    def flip(self):
-        self.backside = ~self.backside
-        return self
+    def __setattr__(self, name, value):
+        raise AttributeError('PokerCard is immutable')
 
-    def display(self):
+    def __reduce__(self):
+        return (PokerCard, (self.suit, self.value))
+
+    def display(self, faceDown=False):
         ''' Designed to look like an ASCII poker card.
         e.g. A card with a suit of HEARTS and a value of 5 should look like the following:
          ___ 
@@ -45,16 +96,72 @@ class PokerCard:
         | ♥ |
         |__5|
         '''
-        if self.backside: # If card is turned on its backside, don't display suit/value
-            return [f' ___ ', f'|## |', f'|###|', f'|_##|']
-        return [f' ___ ',f'|{PokerCard.VALUE.get(self.value, self.value):<3}|', f'| {self.suit} |', f'|_{PokerCard.VALUE.get(self.value, self.value):>2}|']
+        if faceDown: # If card is turned on its backside, don't display suit/value
+            return CARD_BACK
+        return CARD_GLYPHS[self.code]
+
+# Every card in code order; decks hold references to these shared instances
+CARDS = tuple(PokerCard(SUITS[code // 13], CODE_VALUE[code]) for code in range(52))
+
+# The four ASCII rows of every card face (in code order) and of the card back, rendered once
+CARD_BACK   = (' ___ ', '|## |', '|###|', '|_##|')
+CARD_GLYPHS = tuple(
+    (' ___ ', f'|{PokerCard.VALUE.get(card.value, card.value):<3}|', f'| {card.suit} |', f'|_{PokerCard.VALUE.get(card.value, card.value):>2}|')
+    for card in CARDS)
+
+class Hand(list):
+    '''A list of cards that keeps its blackjack total up to date as cards are added,
+    so value, isSoft, isBust and isBlackjack never have to re-walk the hand.
+    Hands only grow: add cards with append() or extend().
+    '''
+    __slots__ = ('hardTotal', 'aces')
+
+    def __init__(self, cards=()):
+        super().__init__()
+        self.hardTotal = 0 # Total with every ace counted as 1
+        self.aces = 0
+        self.extend(cards)
+
+    def __reduce__(self):
+        return (Hand, (list(self),))
+
+    def append(self, card):
+        super().append(card)
+        self.hardTotal += CODE_POINTS[card.code]
+        if card.value == 14:
+            self.aces += 1
+
+    def extend(self, cards):
+        for card in cards:
+            self.append(card)
+
+    @property
+    def isSoft(self):
+        '''True when an ace is being counted as 11.'''
+        return self.aces > 0 and self.hardTotal <= 11
+
+    @property
+    def value(self):
+        if self.aces and self.hardTotal <= 11:
+            return self.hardTotal + 10
+        return self.hardTotal
+
+    @property
+    def isBust(self):
+        return self.hardTotal > 21
+
+    @property
+    def state(self):
+        '''The hand's state in the hand state machine (see HAND_TRANSITION).'''
+        return BUST_STATE if self.hardTotal > 21 else self.hardTotal * 2 + (self.aces > 0)
+
+    @property
+    def isBlackjack(self):
+        return len(self) == 2 and self.aces > 0 and self.hardTotal == 11
 
 class DeckofCards:
     def __init__(self):
-        self.cards = deque([])
-        for suit in (HEARTS, DIAMONDS, SPADES, CLUBS):
-            for value in range(2, 15):
-                self.cards.append(PokerCard(suit, value))
+        self.cards = deque(CARDS)
         random.shuffle(self.cards)
 
     def deal(self):
@@ -63,35 +170,216 @@ class DeckofCards:
     def discard(self, oldcards):
         self.cards.extend(oldcards)
 
+class Shoe:
+    '''A multi-deck shoe of card codes dealt by moving a pointer through a flat array.
+
+    Once the cut card has come out the shoe is reshuffled when the round's
+    cards are discarded, so a round in progress is never interrupted.
+    Counters (see counting.py) are shown every card as it is dealt and are
+    reset whenever the shoe is shuffled.
+    '''
+    def __init__(self, numDecks=NUM_DECKS, penetration=PENETRATION, rng=random, counters=()):
+        self.codes = newDeckCodes(numDecks)
+        self.cutCard = cutCardIndex(len(self.codes), penetration)
+        self.rng = rng
+        self.counters = list(counters)
+        self.shuffle()
+
+    def shuffle(self):
+        self.rng.shuffle(self.codes)
+        self.pointer = 0
+        for counter in self.counters:
+            counter.reset(len(self.codes))
+
+    def deal(self):
+        if self.pointer == len(self.codes): # Only reachable by a freakishly long round
+            self.shuffle()
+        code = self.codes[self.pointer]
+        self.pointer += 1
+        for counter in self.counters:
+            counter.see(code)
+        return CARDS[code]
+
+    def discard(self, oldcards):
+        if self.pointer >= self.cutCard:
+            self.shuffle()
+
+class Ledger:
+    '''A bankroll kept in whole cents, so the balance stays exact however long the session.'''
+    def __init__(self, balance=0):
+        self.balance = balance
+        self.deposited = balance
+        self.rounds = 0
+
+    def __str__(self):
+        return formatCents(self.balance)
+
+    def deposit(self, cents):
+        self.balance += cents
+        self.deposited += cents
+
+    def settle(self, result):
+        '''Apply the net result of a RoundResult.'''
+        self.balance += result.net
+        self.rounds += 1
+
+    @property
+    def profit(self):
+        return self.balance - self.deposited
+
+@dataclasses.dataclass(frozen=True)
+class Rules:
+    '''The house rules of a table.
+
+    Rules are compiled once, when created, into lookup tables over hand states
+    (see HAND_TRANSITION): dealerStands[state] says whether the dealer stands and
+    doubleStates[state] whether a two-card hand may double down, so playing under
+    any rules costs the same lookups. Rules are hashable and can key caches, so
+    doubleTotals and blackjackPays are frozen on creation and may be given as lists.
+    '''
+    numDecks: int = NUM_DECKS
+    hitSoft17: bool = False        # The dealer hits a soft 17 (H17) instead of standing (S17)
+    doubleAfterSplit: bool = True
+    doubleTotals: frozenset = None # Two-card totals that may double down, or None for any
+    surrender: bool = False        # Late surrender of the first two cards for half the bet
+    blackjackPays: tuple = (3, 2)  # A natural pays 3 to 2, rounded down to the cent
+    maxSplits: int = 3             # Pairs can be split and resplit into up to four hands
+    splitAcesOneCard: bool = True  # Each split ace receives exactly one more card
+
+    def __post_init__(self):
+        if self.doubleTotals is not None:
+            object.__setattr__(self, 'doubleTotals', frozenset(self.doubleTotals))
+        object.__setattr__(self, 'blackjackPays', tuple(self.blackjackPays))
+        object.__setattr__(self, 'dealerStands', bytes(
+            STATE_VALUE[state] > 17 or STATE_VALUE[state] == 17 and not (self.hitSoft17 and STATE_SOFT[state])
+            for state in range(NUM_STATES)))
+        object.__setattr__(self, 'doubleStates', bytes(
+            state != BUST_STATE and (self.doubleTotals is None or STATE_VALUE[state] in self.doubleTotals)
+            for state in range(NUM_STATES)))
+
+    @property
+    def maxHands(self):
+        return self.maxSplits + 1
+
+    def blackjackNet(self, bet):
+        '''Net winnings of a natural on the given bet, in cents.'''
+        return bet * self.blackjackPays[0] // self.blackjackPays[1]
+
+    def surrenderNet(self, bet):
+        '''Net loss of surrendering the given bet (half of it, the house keeping any odd cent).'''
+        return bet // 2 - bet
+
+DEFAULT_RULES = Rules()
+
+# Functions - integer card codes
+
+def cutCardIndex(numCards, penetration):
+    '''Return where the cut card goes in a shoe, leaving room for at least one full round after it.'''
+    return max(0, min(int(numCards * penetration), numCards - MAX_ROUND_CARDS))
+
+def encodeCard(card):
+    '''Return the integer code (0 - 51) of a PokerCard.'''
+    return card.code
+
+def decodeCard(code):
+    '''Return the shared PokerCard for an integer card code.'''
+    return CARDS[code]
+
+def newDeckCodes(numDecks=1):
+    '''Return an unshuffled array('B') holding the card codes of numDecks decks.'''
+    return array('B', range(52)) * numDecks
+
+def codesValue(codes):
+    '''Like handValue(), but for an iterable of integer card codes.'''
+    total = 0
+    hasAce = False
+    for code in codes:
+        total += CODE_POINTS[code]
+        if code % 13 == ACE_RANK:
+            hasAce = True
+
+    # At most one ace can ever count as 11 without busting
+    if hasAce and total + 10 <= 21:
+        total += 10
+    return total
+
+def handState(codes, state=START_STATE):
+    '''Return the hand state machine state reached by drawing the given card codes.'''
+    for code in codes:
+        state = HAND_TRANSITION[state * 52 + code]
+    return state
+
+def stateValue(codes):
+    '''Table-driven alternative to handValue() for card codes; any bust scores 22.'''
+    return STATE_VALUE[handState(codes)]
+
+# Functions - money
+
+def parseCents(text):
+    '''Convert a dollar amount typed by the user (e.g. '12.5' or '$3') to whole cents.'''
+    try:
+        dollars = decimal.Decimal(text.strip().lstrip('$'))
+    except decimal.InvalidOperation:
+        raise ValueError(f'Not an amount of money: {text!r}') from None
+    if not dollars.is_finite():
+        raise ValueError(f'Not an amount of money: {text!r}')
+    return int((dollars * 100).to_integral_value(decimal.ROUND_HALF_UP))
+
+def formatCents(cents):
+    '''Format whole cents as dollars, e.g. 1250 as '$12.50'.'''
+    sign = '-' if cents < 0 else ''
+    return f'{sign}${abs(cents) // 100}.{abs(cents) % 100:02d}'
+
 # Functions
 
-def getBet(maxBet):
-    '''Ask the player how much they want to bet for this round, with the option to quit.'''
+def getAmount(prompt, minAmount, maxAmount, canQuit=False):
+    '''Ask the player for an amount of money (in cents) between minAmount and maxAmount,
+    asking again until they give one. With canQuit they may type QUIT at any prompt.'''
     while True:
-        bet = input(f'How much do you want to bet? ($0.50 - ${maxBet:.2f}, or QUIT)\n> ').upper().strip()
-        if bet == 'QUIT':
+        amount = input(prompt).upper().strip()
+        if canQuit and amount == 'QUIT':
             print('Thanks for playing!')
             sys.exit()
-        # User error: bet is outside of range
-        bet = float(bet)
-        while bet > maxBet or bet < 0.5:
-            bet = float(input(f'Please enter an amount in the specified range.\n> '))
-        return bet
+        try:
+            amount = parseCents(amount)
+        except ValueError:
+            amount = None
+        if amount is not None and minAmount <= amount <= maxAmount:
+            return amount
+        # User error: amount is not money or outside of range
+        prompt = f'Please enter an amount in the specified range{", or QUIT" if canQuit else ""}.\n> '
+
+def getBet(maxBet):
+    '''Ask the player how much they want to bet for this round (in cents), with the option to quit.'''
+    return getAmount(f'How much do you want to bet? ({formatCents(MIN_BET)} - {formatCents(maxBet)}, or QUIT)\n> ',
+                     MIN_BET, maxBet, canQuit=True)
+
+def getInsurance(maxInsurance):
+    '''Ask the player how much insurance they want (in cents), from a single cent up to maxInsurance.'''
+    return getAmount(f'How much insurance do you want? ({formatCents(1)} - {formatCents(maxInsurance)})\n> ',
+                     1, maxInsurance)
+
+def getDoubleBet(maxBet):
+    '''Ask the player how much more they want to bet on a double down (in cents), from a single cent up to maxBet.'''
+    return getAmount(f'How much more do you want to bet? ({formatCents(1)} - {formatCents(maxBet)})\n> ',
+                     1, maxBet)
+
+def renderCards(cards, faceDownFirst=False):
+    '''Compose the pre-rendered rows of a set of cards side by side into a single string.'''
+    glyphs = [CARD_GLYPHS[card.code] for card in cards]
+    if faceDownFirst and glyphs:
+        glyphs[0] = CARD_BACK
+    return '\n'.join([' '.join(row) for row in zip(*glyphs)])
 
 def displayCards(firstSet, secondSet, showDealer):
-    '''Display the cards in each of the players' hands.'''
-    if showDealer:
-        print(f'DEALER HAND: {handValue(firstSet)}')
-        firstSet[0] = firstSet[0].flip()
-    else:
-        print('DEALER HAND: ???')
-    for row in range(4):
-        print(' '.join([card.display()[row] for card in firstSet]))
-
-    print(f'\nYOUR HAND: {handValue(secondSet)}')
-    for row in range(4):
-        print(' '.join([card.display()[row] for card in secondSet]))
-    print()
+    '''Display the cards in each of the players' Hands with a single write.
+    secondSet may also be a list of the user's split Hands, shown one after another.
+    Unless showDealer is set, the dealer's first (hole) card is shown face down.'''
+    dealerTotal = firstSet.value if showDealer else '???'
+    userHands = [secondSet] if isinstance(secondSet, Hand) else secondSet
+    userText = ''.join(f'\nYOUR HAND{f" {number}" if len(userHands) > 1 else ""}: {hand.value}\n{renderCards(hand)}\n'
+                       for number, hand in enumerate(userHands, 1))
+    print(f'DEALER HAND: {dealerTotal}\n{renderCards(firstSet, not showDealer)}\n{userText}')
 
 def handValue(cards):
     '''Given a set of cards, calculate the total value.'''
@@ -113,12 +401,16 @@ def handValue(cards):
 
     return total
 
-def getMove(cards, money, name):
-    '''Asks player for their move and returns the move code ('H', 'S', 'D', 'Q').'''
+def getMove(canDouble, name, canSplit=False, canSurrender=False):
+    '''Asks player for their move and returns the move code ('H', 'S', 'D', 'P', 'R').'''
     # Determine possible moves for player
     moves = {'(H)it', '(S)tand'}
-    if len(cards) == 2 and money > 0:
+    if canDouble:
         moves.add('(D)ouble down')
+    if canSplit:
+        moves.add('S(P)lit')
+    if canSurrender:
+        moves.add('Su(R)render')
 
     # Get the player's move, looping until correct input
     while True:
@@ -127,13 +419,259 @@ def getMove(cards, money, name):
             return move
         if move == 'D' and '(D)ouble down' in moves:
             return move
+        if move == 'P' and 'S(P)lit' in moves:
+            return move
+        if move == 'R' and 'Su(R)render' in moves:
+            return move
+
+# Round engine
+
+@dataclasses.dataclass
+class RoundResult:
+    '''The settled outcome of a single round played by playRound(); money is in cents.
+    Split hands appear in userHands (with their bets and outcomes) in the order played.'''
+    dealerHand: Hand
+    userHands: list
+    bets: list
+    net: int
+    outcomes: list
+    insurance: int = 0
+    doubled: bool = False
+
+    @property
+    def userHand(self):
+        return self.userHands[0]
+
+    @property
+    def bet(self):
+        return sum(self.bets)
+
+    @property
+    def outcome(self):
+        return self.outcomes[0]
+
+class Player:
+    '''Decision-making interface for playRound().
+
+    Subclasses override move() to choose 'H', 'S', 'D', 'P' (split) or 'R'
+    (surrender), and may override the remaining hooks to show the round as it unfolds. The defaults
+    stand on everything, never take insurance, double for the full original bet
+    and stay silent.
+    '''
+    def move(self, userHand, dealerHand, canDouble, canSplit, canSurrender):
+        return 'S'
+
+    def insurance(self, dealerHand, userHand, maxInsurance):
+        return 0
+
+    def doubleBet(self, bet, maxBet):
+        return min(bet, maxBet)
+
+    def dealt(self, dealerHand, userHand, bet):
+        pass
+
+    def userSplit(self, dealerHand, userHands):
+        pass
+
+    def userDrew(self, card, dealerHand, userHand):
+        pass
+
+    def dealerUp(self, dealerHand, userHands):
+        pass
+
+    def dealerHit(self, card, dealerHand, userHands):
+        pass
+
+def settleRound(userValue, dealerValue, bet):
+    '''Return the outcome code and the player's net winnings for final hand values.'''
+    if userValue > 21:
+        return 'BUST', -bet
+    if dealerValue > 21:
+        return 'DEALER_BUST', bet
+    if userValue < dealerValue:
+        return 'LOSS', -bet
+    if userValue > dealerValue:
+        return 'WIN', bet
+    return 'TIE', 0
+
+def settleNaturals(userHand, dealerHand, bet, rules=DEFAULT_RULES):
+    '''Return the outcome code and net winnings when either starting hand is a blackjack.'''
+    if userHand.isBlackjack and dealerHand.isBlackjack:
+        return 'TIE', 0
+    if dealerHand.isBlackjack:
+        return 'DEALER_BLACKJACK', -bet
+    return 'BLACKJACK', rules.blackjackNet(bet)
+
+def canSplitHand(hand):
+    '''True for a two-card hand whose cards have the same point value (e.g. a king and a ten).'''
+    return len(hand) == 2 and CODE_POINTS[hand[0].code] == CODE_POINTS[hand[1].code]
+
+def playRound(deck, bet, player, funds=float('inf'), rules=DEFAULT_RULES):
+    '''Play one round from the deck under the given Rules without any console I/O
+    and return a RoundResult.
+
+    The player object makes every decision; funds is the player's total money
+    (in cents, like bet) and only limits how much more they can put on the table
+    to take insurance, double down or split.
+    '''
+    # Deal to the both user and player
+    dealerHand = Hand((deck.deal(), deck.deal())) # The first card is the face-down hole card
+    userHand = Hand((deck.deal(), deck.deal()))
+    player.dealt(dealerHand, userHand, bet)
+
+    # Offer insurance against a dealer blackjack when the upcard is an ace
+    insurance = 0
+    if dealerHand[1].value == 14:
+        maxInsurance = min(bet // 2, funds - bet)
+        insurance = max(0, min(player.insurance(dealerHand, userHand, maxInsurance), maxInsurance))
+    insuranceNet = insurance * INSURANCE_PAYS if dealerHand.isBlackjack else -insurance
+
+    # The dealer checks for a blackjack, so naturals end the round at once
+    if userHand.isBlackjack or dealerHand.isBlackjack:
+        outcome, net = settleNaturals(userHand, dealerHand, bet, rules)
+        return RoundResult(dealerHand, [userHand], [bet], net + insuranceNet, [outcome], insurance)
+
+    # Handle player actions hand by hand; a split replaces the hand with two hands in play order
+    userHands = [userHand]
+    bets = [bet]
+    doubled = False
+    surrendered = False
+    index = 0
+    while index < len(userHands):
+        hand = userHands[index]
+        if len(hand) == 1: # A split hand receives its second card on its turn
+            newCard = deck.deal()
+            hand.append(newCard)
+            player.userDrew(newCard, dealerHand, hand)
+
+        while hand.value < 21:
+            if len(userHands) > 1 and hand[0].value == 14 and rules.splitAcesOneCard:
+                break
+            spare = funds - sum(bets) - insurance
+            canDouble = (len(hand) == 2 and spare > 0 and rules.doubleStates[hand.state]
+                         and (len(userHands) == 1 or rules.doubleAfterSplit))
+            canSplit = canSplitHand(hand) and len(userHands) < rules.maxHands and spare >= bets[index]
+            canSurrender = rules.surrender and len(hand) == 2 and len(userHands) == 1
+            userMove = player.move(hand, dealerHand, canDouble, canSplit, canSurrender)
+            if userMove == 'R' and canSurrender:
+                surrendered = True
+                break
+            if userMove == 'P' and canSplit:
+                userHands[index:index + 1] = [Hand(hand[:1]), Hand(hand[1:])]
+                bets.insert(index, bets[index])
+                player.userSplit(dealerHand, userHands)
+                hand = userHands[index]
+                userMove = 'H' # The first hand receives its second card straight away
+            elif userMove == 'D' and canDouble: # Increase the bet by up to the original value
+                bets[index] += player.doubleBet(bets[index], min(bets[index], spare))
+                doubled = True
+            elif userMove in ('D', 'P', 'R'):
+                userMove = 'H'
+
+            if userMove in ('H', 'D'):
+                newCard = deck.deal()
+                hand.append(newCard)
+                player.userDrew(newCard, dealerHand, hand)
+
+            if userMove in ('S', 'D'):
+                break
+        index += 1
+
+    # Dealer's actions
+    player.dealerUp(dealerHand, userHands)
+    dealerStands = rules.dealerStands
+    while not dealerStands[dealerHand.state]:
+        newCard = deck.deal()
+        dealerHand.append(newCard)
+        player.dealerHit(newCard, dealerHand, userHands)
+
+    if surrendered:
+        return RoundResult(dealerHand, userHands, bets, insuranceNet + rules.surrenderNet(bet), ['SURRENDER'], insurance)
+    outcomes = []
+    net = insuranceNet
+    for hand, handBet in zip(userHands, bets):
+        outcome, handNet = settleRound(hand.value, dealerHand.value, handBet)
+        outcomes.append(outcome)
+        net += handNet
+    return RoundResult(dealerHand, userHands, bets, net, outcomes, insurance, doubled)
+
+class ConsolePlayer(Player):
+    '''Player driven by a human at the terminal through input() and print().'''
+    def __init__(self, name):
+        self.name = name
+
+    def move(self, userHand, dealerHand, canDouble, canSplit, canSurrender):
+        return getMove(canDouble, self.name, canSplit, canSurrender)
+
+    def insurance(self, dealerHand, userHand, maxInsurance):
+        if maxInsurance <= 0:
+            return 0
+        takeInsurance = input('The dealer shows an ace. Do you want insurance? (Y\\N)\n> ').upper().strip()
+        # User error: improper selection
+        while takeInsurance != 'N' and takeInsurance != 'Y':
+            takeInsurance = input(f'Please input \'Y\' for insurance or \'N\' to decline.\n> ').upper().strip()
+        if takeInsurance == 'N':
+            return 0
+        insurance = getInsurance(maxInsurance)
+        print(f'Insurance: {formatCents(insurance)}')
+        return insurance
+
+    def doubleBet(self, bet, maxBet):
+        additionalBet = getDoubleBet(maxBet)
+        print(f'Bet increased to {formatCents(bet + additionalBet)}')
+        print(f'Bet: {formatCents(bet + additionalBet)}')
+        return additionalBet
+
+    def dealt(self, dealerHand, userHand, bet):
+        print(f'Bet: {formatCents(bet)}')
+        displayCards(dealerHand, userHand, False)
+
+    def userSplit(self, dealerHand, userHands):
+        print(f'Hand split! You are now playing {len(userHands)} hands.')
+
+    def userDrew(self, card, dealerHand, userHand):
+        print(f'You drew a {PokerCard.VALUE.get(card.value, card.value)} of {card.suit}!')
+        displayCards(dealerHand, userHand, False)
+
+    def dealerUp(self, dealerHand, userHands):
+        # Give the user the opportunity to evaluate
+        input('Dealer is up next! Press Enter when ready.')
+
+    def dealerHit(self, card, dealerHand, userHands):
+        print('Dealer hits...')
+        displayCards(dealerHand, userHands, False)
+        input('Press Enter to continue.')
 
 # Main Function
 
-def main():
+def describeRules(rules):
+    '''Return the lines of the game rules text that depend on the table's Rules.'''
+    doubleOn = '' if rules.doubleTotals is None else ' on ' + ', '.join(map(str, sorted(rules.doubleTotals)))
+    lines = [
+        f'On your first play, you can (D)ouble down{doubleOn} to increase your bet',
+        'but must hit exactly one more time before standing.',
+        'You can S(P)lit a pair of equal cards into two hands with',
+        f'equal bets, up to {rules.maxHands} hands.' + (' Split aces receive one card each.' if rules.splitAcesOneCard else ''),
+    ]
+    if not rules.doubleAfterSplit:
+        lines.append('Split hands cannot be doubled down.')
+    if rules.surrender:
+        lines.append('Instead of playing your first two cards, you can Su(R)render half your bet.')
+    lines += [
+        'In case of a tie, the bet is returned to the player.',
+        f'A blackjack (ace and ten on the first two cards) pays {rules.blackjackPays[0]} to {rules.blackjackPays[1]}.',
+        'When the dealer shows an ace you may take insurance, up to',
+        'half your bet, which pays 2 to 1 if the dealer has blackjack.',
+        'The dealer hits a soft 17 and stops hitting at hard 17.' if rules.hitSoft17 else 'The dealer stops hitting at 17.',
+        f'Cards are dealt from a {rules.numDecks}-deck shoe, reshuffled after the cut card.',
+    ]
+    return lines
+
+def main(rules=DEFAULT_RULES):
 
     # Print game rules
-    print('''Welcome to my blackjack table!
+    ruleLines = ''.join(f'    {line}\n' for line in describeRules(rules))
+    print(f'''Welcome to my blackjack table!
 
     --- GAME RULES ---
     Try to get as close to 21 without going over.
@@ -142,24 +680,20 @@ def main():
     Cards 2 through 10 are worth their face value.
     (H)it to take another card.
     (S)tand to stop taking cards.
-    On your first play, you can (D)ouble down to increase your bet
-    but must hit exactly one more time before standing.
-    In case of a tie, the bet is returned to the player.
-    The dealer stops hitting at 17.
-    This game does not account for naturals, splitting, or any
-    kind of insurance.
-    ''')
+{ruleLines}    ''')
 
     # User introduction
     userName = input('What\'s your name, player?\n> ')
-    userMoney = float(input('How much money are you playing with today (in dollars)?\n> '))
+    userMoney = Ledger(getAmount(f'How much money are you playing with today? ({formatCents(MIN_BET)} - {formatCents(MAX_DEPOSIT)})\n> ',
+                                 MIN_BET, MAX_DEPOSIT))
     print(f'Best of luck, {userName}!\n\n')
-    deck = DeckofCards()
+    deck = Shoe(rules.numDecks)
+    player = ConsolePlayer(userName)
     roundcount = 1
  
     while True:
-        # Check if the player is out of money and offer chance to buy back in
-        if userMoney <= 0:
+        # Check if the player cannot cover the minimum bet and offer chance to buy back in
+        if userMoney.balance < MIN_BET:
             print('You\'re out of money!')
             keepPlaying = input('Do you want to buy back in to keep playing? (Y\\N)\n> ').upper().strip()
             # User error: improper selection
@@ -168,88 +702,46 @@ def main():
             if keepPlaying == 'N':
                 print('Thanks for playing!')
                 sys.exit()
-            moreMoney = float(input('How much money would you like to add to your funds?\n> '))
-            # User error: did not meet minimum addition
-            while moreMoney < 0.5:
-                moreMoney = float(input('Minimum addition is $0.50.\n> ')) 
-            userMoney += moreMoney
+            userMoney.deposit(getAmount(f'How much money would you like to add to your funds? ({formatCents(MIN_BET)} - {formatCents(MAX_DEPOSIT)})\n> ',
+                                        MIN_BET, MAX_DEPOSIT))
         
         # Let player enter bet for the first round
         print(f'--- ROUND {roundcount} ---')
-        print(f'YOUR FUNDS: ${userMoney:.2f}')
-        bet = getBet(userMoney)
-
-        # Deal to the both user and player
-        dealerHand = [deck.deal().flip(), deck.deal()]
-        userHand = [deck.deal(), deck.deal()]
-
-        # Handle player actions
-        print(f'Bet: ${bet:.2f}')
-        displayCards(dealerHand, userHand, False)
-        while True: # Keep looping until player stands or busts
-            
-            # Check if the player has lost
-            if handValue(userHand) > 21:
-                break
-
-            # Check if the player has already won
-            if handValue(userHand) == 21:
-                break
+        print(f'YOUR FUNDS: {userMoney}')
+        bet = getBet(userMoney.balance)
 
-            # Get the player's move if they have not lost yet
-            userMove = getMove(userHand, userMoney - bet, userName)
-            if userMove == 'D': # Option to increase their bet to twice the original value
-                additionalBet = getBet(min(bet, (userMoney-bet)))
-                bet += additionalBet
-                print(f'Bet increased to ${bet:.2f}')
-                print(f'Bet: ${bet:.2f}')
-
-            if userMove in ('H', 'D'): # If user selected to double down OR hit, they receive another card
-                newCard = deck.deal()
-                print(f'You drew a {PokerCard.VALUE.get(newCard.value, newCard.value)} of {newCard.suit}!')
-                userHand.append(newCard)
-                displayCards(dealerHand, userHand, False)
-
-                # Check if the player has lost
-                if handValue(userHand) > 21:
-                    continue
-            
-            if userMove in ('S', 'D'):
-                break
-
-        # Give the user the opportunity to evaluate
-        input('Dealer is up next! Press Enter when ready.')
-    
-        # Dealer's actions
-        if handValue(dealerHand) <= 21:
-            while handValue(dealerHand) < 17:
-                print('Dealer hits...')
-                dealerHand.append(deck.deal())
-                displayCards(dealerHand, userHand, False)
-                input('Press Enter to continue.')
-                if handValue(dealerHand) > 21:
-                    break
+        result = playRound(deck, bet, player, userMoney.balance, rules)
 
         # Show final hands
-        displayCards(dealerHand, userHand, True)
-        finalUserVal = handValue(userHand)
-        finalDealVal = handValue(dealerHand)
+        displayCards(result.dealerHand, result.userHands, True)
 
         # Handle final results
-        if finalDealVal > 21:
-            print(f'Dealer busts! You win ${bet:.2f}!')
-            userMoney += bet
-        elif finalUserVal > 21 or finalUserVal < finalDealVal:
-            print('You lost!')
-            userMoney -= bet
-        elif finalUserVal > finalDealVal:
-            print(f'You won ${bet:.2f}, {userName}!')
-            userMoney += bet
-        elif finalUserVal == finalDealVal:
-            print('It\'s a tie -- bet is returned to you.')
+        if result.insurance:
+            if result.dealerHand.isBlackjack:
+                print(f'Insurance pays {formatCents(result.insurance * INSURANCE_PAYS)}!')
+            else:
+                print('Insurance lost.')
+        for number, (outcome, handBet) in enumerate(zip(result.outcomes, result.bets), 1):
+            if len(result.outcomes) > 1:
+                print(f'Hand {number}: ', end='')
+            if outcome == 'BLACKJACK':
+                print(f'Blackjack! You win {formatCents(rules.blackjackNet(handBet))}, {userName}!')
+            elif outcome == 'SURRENDER':
+                print(f'You surrendered and get back {formatCents(handBet + rules.surrenderNet(handBet))}.')
+            elif outcome == 'DEALER_BLACKJACK':
+                print('Dealer has blackjack! You lost!')
+            elif outcome == 'DEALER_BUST':
+                print(f'Dealer busts! You win {formatCents(handBet)}!')
+            elif outcome in ('BUST', 'LOSS'):
+                print('You lost!')
+            elif outcome == 'WIN':
+                print(f'You won {formatCents(handBet)}, {userName}!')
+            else:
+                print('It\'s a tie -- bet is returned to you.')
+        userMoney.settle(result)
 
         # Discard the used cards and move onto next round
-        deck.discard(dealerHand + userHand)
+        deck.discard(result.dealerHand + [card for hand in result.userHands for card in hand])
         roundcount += 1
         input('Press Enter to continue.')
         print('\n\n')
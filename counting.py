@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+
+''' counting.py -- card-counting systems for blackjack.py
+    A CardCounter keeps a running count from a tag per rank and updates it in
+    constant time for every card it sees. Attach counters to a blackjack.Shoe to
+    have them follow the deal, or feed several of them the same card codes with
+    countCodes() to compare systems on identical card sequences.
+'''
+
+# Constants - tags per rank, from 2 up to the ace
+
+HI_LO       = (1, 1, 1, 1, 1, 0, 0, 0, -1, -1, -1, -1, -1)
+KO          = (1, 1, 1, 1, 1, 1, 0, 0, -1, -1, -1, -1, -1)
+OMEGA_II    = (1, 1, 2, 2, 2, 1, 0, -1, -2, -2, -2, -2, 0)
+
+# Classes
+
+class CardCounter:
+    '''A counting system defined by a tag for each rank (2 through ace).
+
+    Unbalanced systems start every shoe at startPerDeck * decks + startOffset
+    (KO uses -4 and 4); balanced ones start at 0.
+    '''
+    def __init__(self, name, tags, startPerDeck=0, startOffset=0):
+        if len(tags) != 13:
+            raise ValueError('A counting system needs exactly one tag for each of the 13 ranks.')
+        self.name = name
+        self.tags = tuple(tags)
+        self.tagOf = tuple(self.tags[code % 13] for code in range(52)) # Indexed by card code
+        self.startPerDeck = startPerDeck
+        self.startOffset = startOffset
+        self.reset()
+
+    def reset(self, numCards=52):
+        '''Start counting a freshly shuffled shoe of numCards cards.'''
+        self.cardsLeft = numCards
+        self.runningCount = self.startPerDeck * (numCards // 52) + self.startOffset
+
+    def see(self, code):
+        self.runningCount += self.tagOf[code]
+        self.cardsLeft -= 1
+
+    @property
+    def decksLeft(self):
+        return max(self.cardsLeft, 1) / 52
+
+    @property
+    def trueCount(self):
+        '''Running count per deck left in the shoe.'''
+        return self.runningCount / self.decksLeft
+
+# Functions
+
+def hiLo():
+    return CardCounter('Hi-Lo', HI_LO)
+
+def ko():
+    return CardCounter('KO', KO, startPerDeck=-4, startOffset=4)
+
+def omegaII():
+    return CardCounter('Omega II', OMEGA_II)
+
+def countCodes(codes, counters, numCards=None):
+    '''Reset the counters for a shoe of numCards cards (by default len(codes)), feed
+    them every card code in order in a single pass, and return their running counts.'''
+    codes = list(codes)
+    for counter in counters:
+        counter.reset(len(codes) if numCards is None else numCards)
+    sees = [counter.see for counter in counters]
+    for code in codes:
+        for see in sees:
+            see(code)
+    return [counter.runningCount for counter in counters]
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+
+''' edge.py -- exact house edge for blackjack.py
+    Computes the expected return of a strategy table under a blackjack.Rules by
+    enumerating every dealer upcard, hole card and two-card player hand with
+    composition-dependent probabilities, then every card the player and dealer
+    can draw from what is left. Play values are memoized per hand and
+    composition, and starting hand/upcard pairs are spread over a process pool.
+    Splits are the one approximation: a pair is split at most once (resplits are
+    not valued) and both split hands draw from the same composition.
+'''
+
+import functools
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import blackjack
+import odds
+import strategy
+
+# Constants - kinds of player hand
+
+UNSPLIT    = 0
+SPLIT      = 1
+SPLIT_ACES = 2 # A split ace that takes exactly one more card
+
+# Functions - play values
+# Every value is in units of the initial bet for a dealer known to hold (dealerHard, dealerAce),
+# the upcard and hole card together, with the composition of the cards left after every
+# card dealt so far. The strategy only ever sees the upcard index, as a player would.
+
+def standValue(playerTotal, dealerHard, dealerAce, composition, rules):
+    '''Expected value of standing on a total against the dealer's two cards.'''
+    if playerTotal > 21:
+        return -1.0
+    value = 0.0
+    for total, chance in zip(odds.DEALER_TOTALS, odds.dealerOutcomes(dealerHard, dealerAce, composition, rules.hitSoft17)):
+        value += chance * blackjack.settleRound(playerTotal, total, 1)[1]
+    return value
+
+@functools.lru_cache(maxsize=None)
+def handValue(hardTotal, hasAce, numCards, kind, dealer, composition, table, rules):
+    '''Expected value of playing on a player hand by the strategy table until it stands,
+    doubles, surrenders or busts. numCards is 2 for a hand still on its first two cards
+    and 3 for any longer hand; dealer is (dealerHard, dealerAce, upcard index).'''
+    dealerHard, dealerAce, upcard = dealer
+    total = odds.handTotal(hardTotal, hasAce)
+    if total >= 21 or kind == SPLIT_ACES:
+        return standValue(total, dealerHard, dealerAce, composition, rules)
+
+    action = table[strategy.tableIndex(total, hasAce and hardTotal <= 11, upcard)]
+    if action in (strategy.DOUBLE, strategy.DOUBLE_OR_STAND):
+        allowed = (numCards == 2 and rules.doubleStates[hardTotal * 2 + hasAce]
+                   and (kind == UNSPLIT or rules.doubleAfterSplit))
+    elif action >= strategy.SURRENDER:
+        allowed = numCards == 2 and kind == UNSPLIT and rules.surrender
+    else:
+        allowed = True
+    move = strategy.MOVES[action] if allowed else strategy.FALLBACK_MOVES[action]
+
+    if move == 'S':
+        return standValue(total, dealerHard, dealerAce, composition, rules)
+    if move == 'R':
+        return -0.5
+    value = 0.0
+    for point, chance, rest in odds.drawChances(composition):
+        hard = hardTotal + point
+        ace = hasAce or point == 1
+        if move == 'D':
+            value += chance * 2 * standValue(odds.handTotal(hard, ace), dealerHard, dealerAce, rest, rules)
+        else:
+            value += chance * handValue(hard, ace, 3, kind, dealer, rest, table, rules)
+    return value
+
+def splitValue(point, dealer, composition, table, rules):
+    '''Expected value of splitting a pair with the given point value and playing both hands
+    by the table. Like odds.splitValue(), resplitting is not counted and both hands draw
+    from the same composition; everything else is exact.'''
+    kind = SPLIT_ACES if point == 1 and rules.splitAcesOneCard else SPLIT
+    value = 0.0
+    for drawn, chance, rest in odds.drawChances(composition):
+        value += chance * handValue(point + drawn, point == 1 or drawn == 1, 2, kind, dealer, rest, table, rules)
+    return 2 * value
+
+# Functions - enumeration
+
+def startingHands(composition):
+    '''Yield (upcard point, first card point, second card point, probability, composition
+    after the three cards) for every upcard and unordered two-card player hand.'''
+    for upcard, upChance, afterUp in odds.drawChances(composition):
+        for first, firstChance, afterFirst in odds.drawChances(afterUp):
+            for second, secondChance, rest in odds.drawChances(afterFirst):
+                if second < first:
+                    continue
+                chance = upChance * firstChance * secondChance * (1 if first == second else 2)
+                yield upcard, first, second, chance, rest
+
+def startValue(upcard, first, second, composition, table, rules):
+    '''Expected value of a starting hand against an upcard (point values, aces are 1), averaged
+    over every hole card the dealer can hold. composition excludes the three known cards.'''
+    upIndex = 11 if upcard == 1 else upcard
+    natural = {first, second} == {1, 10}
+    pair = first == second and rules.maxHands > 1 and table[strategy.pairIndex(11 if first == 1 else first, upIndex)]
+    value = 0.0
+    for hole, chance, rest in odds.drawChances(composition):
+        if {upcard, hole} == {1, 10}: # The dealer peeks and settles their blackjack at once
+            value += chance * (0.0 if natural else -1.0)
+        elif natural:
+            value += chance * rules.blackjackPays[0] / rules.blackjackPays[1]
+        elif pair:
+            value += chance * splitValue(first, (upcard + hole, upcard == 1 or hole == 1, upIndex), rest, table, rules)
+        else:
+            value += chance * handValue(first + second, first == 1 or second == 1, 2, UNSPLIT,
+                                        (upcard + hole, upcard == 1 or hole == 1, upIndex), rest, table, rules)
+    return value
+
+def expectedReturn(numDecks=None, rules=blackjack.DEFAULT_RULES, table=None, workers=1):
+    '''Return the exact expected return per initial bet of playing the strategy table
+    (by default the infinite-deck basic strategy for the rules) from a full shoe of
+    numDecks decks (by default rules.numDecks). The house edge is its negative.
+
+    It is exact except for splits (see splitValue()): a pair is split at most once
+    and both hands draw from the same composition, so for rules with maxSplits > 1
+    the value is the same as with maxSplits=1 and slightly understates the player.
+
+    workers > 1 (or None for every core) values the starting hands across a process
+    pool; hands are dealt out in upcard order so each worker's caches stay warm, and
+    the values are summed in a fixed order, so the result never depends on workers.
+    '''
+    if table is None:
+        table = strategy.basicStrategy(odds.INFINITE_DECK, rules)
+    shoe = odds.shoeComposition(rules.numDecks if numDecks is None else numDecks)
+    starts = list(startingHands(shoe))
+    args = [[start[index] for start in starts] for index in (0, 1, 2, 4)] + [[table] * len(starts), [rules] * len(starts)]
+
+    pool = None if workers == 1 else ProcessPoolExecutor(workers)
+    try:
+        values = map(startValue, *args) if pool is None else pool.map(startValue, *args, chunksize=len(starts) // 40 + 1)
+        total = sum(start[3] * value for start, value in zip(starts, values))
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    handValue.cache_clear()
+    odds.clearCaches()
+    return total
+
+def printHouseEdges(deckCounts, rules=blackjack.DEFAULT_RULES, workers=1):
+    print('House edge of basic strategy (pairs split once, resplits not valued)')
+    print(f'{"DECKS":<8}{"HOUSE EDGE":>14}{"SECONDS":>10}')
+    for numDecks in deckCounts:
+        start = time.perf_counter()
+        edge = -expectedReturn(numDecks, rules, workers=workers)
+        print(f'{numDecks:<8}{edge:>13.6%}{time.perf_counter() - start:>10.1f}')
+
+# Main Execution
+
+if __name__ == '__main__':
+    deckCounts = [int(arg) for arg in sys.argv[1:]] or range(1, 9)
+    printHouseEdges(deckCounts, workers=None)
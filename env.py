@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+
+''' env.py -- reinforcement-learning environments for blackjack.py
+    Gym-style environments over the round logic of playRound(). An episode is
+    one round: observations are (player total, soft flag, dealer upcard with aces
+    as 11, can double down), actions are simulate.STAND, HIT and DOUBLE, and the
+    reward is the net result in initial bets. A hand that has reached 21 stands
+    on any action, just like in playRound(), and a round with a natural on either
+    side is settled by whatever action comes next. Dealer play, doubling and the
+    blackjack payout follow a blackjack.Rules; the environments do not offer
+    splitting, surrender or insurance.
+'''
+
+import numpy as np
+
+import blackjack
+import simulate
+from simulate import DOUBLE, HIT, STAND, STATE_SOFT, STATE_VALUE, TRANSITION
+
+# Constants
+
+BET_CENTS = 100 # Rounds are settled in cents on this bet, then rewards are reported in bets
+
+# Classes
+
+class BlackjackEnv:
+    '''A single table. reset() returns (observation, info); step(action) returns
+    (observation, reward, terminated, truncated, info).'''
+    def __init__(self, numDecks=None, penetration=blackjack.PENETRATION, seed=None, rules=blackjack.DEFAULT_RULES):
+        self.vector = VecBlackjackEnv(1, numDecks, penetration, seed, rules)
+
+    def reset(self, seed=None):
+        observations, info = self.vector.reset(seed)
+        return observations[0], info
+
+    def step(self, action):
+        observations, rewards, terminated, truncated, info = self.vector.step(np.array([action]))
+        return observations[0], float(rewards[0]), bool(terminated[0]), bool(truncated[0]), info
+
+class VecBlackjackEnv:
+    '''numEnvs independent tables stepped together on NumPy arrays.
+
+    Each table deals from its own shoe of numDecks decks (by default
+    rules.numDecks), reshuffled at the cut card. Tables whose
+    round ends are reset automatically, so the observations returned by step()
+    for those lanes already belong to the next round.
+    '''
+    def __init__(self, numEnvs, numDecks=None, penetration=blackjack.PENETRATION, seed=None, rules=blackjack.DEFAULT_RULES):
+        self.numEnvs = numEnvs
+        self.numDecks = rules.numDecks if numDecks is None else numDecks
+        self.penetration = penetration
+        self.rules = rules
+        self.doubleStates = simulate.ruleTables(rules)[1]
+        self.rng = np.random.default_rng(seed)
+        self.lanes = np.arange(numEnvs)
+
+    def reset(self, seed=None):
+        if seed is not None:
+            self.rng = np.random.default_rng(seed)
+        self.shoes = simulate.shuffledShoes(self.rng, self.numEnvs, self.numDecks)
+        self.cutCard = blackjack.cutCardIndex(self.shoes.shape[1], self.penetration)
+        self.pointer = np.zeros(self.numEnvs, dtype=np.intp)
+        self.userState = np.zeros(self.numEnvs, dtype=np.uint8)
+        self.dealerState = np.zeros(self.numEnvs, dtype=np.uint8)
+        self.upcard = np.zeros(self.numEnvs, dtype=np.uint8)
+        self.canDouble = np.zeros(self.numEnvs, dtype=bool)
+        self.natural = np.zeros(self.numEnvs, dtype=bool)
+        self.doubled = np.zeros(self.numEnvs, dtype=bool)
+        self.deal(self.lanes)
+        return self.observe(), {}
+
+    def observe(self):
+        return np.stack([STATE_VALUE[self.userState], STATE_SOFT[self.userState], self.upcard, self.canDouble], axis=1).astype(np.int8)
+
+    def draw(self, lanes):
+        cards = self.shoes[lanes, self.pointer[lanes] % self.shoes.shape[1]]
+        self.pointer[lanes] += 1
+        return cards
+
+    def deal(self, lanes):
+        '''Start a new round in the given lanes, reshuffling any shoe past its cut card.'''
+        spent = lanes[self.pointer[lanes] >= self.cutCard]
+        self.shoes[spent] = simulate.shuffledShoes(self.rng, len(spent), self.numDecks)
+        self.pointer[spent] = 0
+
+        # Deal to the both user and player; the dealer's second card is the upcard
+        hole, upcard = self.draw(lanes), self.draw(lanes)
+        self.dealerState[lanes] = TRANSITION[TRANSITION[blackjack.START_STATE, hole], upcard]
+        self.upcard[lanes] = simulate.UPCARD[upcard]
+        self.userState[lanes] = TRANSITION[TRANSITION[blackjack.START_STATE, self.draw(lanes)], self.draw(lanes)]
+        self.natural[lanes] = (STATE_VALUE[self.userState[lanes]] == 21) | (STATE_VALUE[self.dealerState[lanes]] == 21)
+        self.canDouble[lanes] = ~self.natural[lanes] & self.doubleStates[self.userState[lanes]]
+        self.doubled[lanes] = False
+
+    def step(self, actions):
+        actions = np.asarray(actions)
+        actions = np.where((actions == DOUBLE) & ~self.canDouble, HIT, actions)
+        actions = np.where((STATE_VALUE[self.userState] >= 21) | self.natural, STAND, actions)
+
+        # Handle player actions
+        drawing = self.lanes[actions != STAND]
+        self.userState[drawing] = TRANSITION[self.userState[drawing], self.draw(drawing)]
+        self.doubled[actions == DOUBLE] = True
+        self.canDouble[:] = False
+        total = STATE_VALUE[self.userState]
+        done = self.lanes[(actions != HIT) | (total >= 21)]
+
+        # Dealer's actions for every finished round without a natural
+        finished = np.zeros(self.numEnvs, dtype=bool)
+        finished[done] = True
+        dealerTotal = simulate.playDealer(self.shoes, self.pointer, self.dealerState, finished & ~self.natural, self.rules)[0][done]
+
+        # Handle final results exactly like blackjack.settleRound() and settleNaturals()
+        userTotal = total[done]
+        natural = self.natural[done]
+        net = simulate.settleBatch(userTotal, dealerTotal, BET_CENTS, self.doubled[done],
+                                   natural & (userTotal == 21), natural & (dealerTotal == 21), rules=self.rules)
+        rewards = np.zeros(self.numEnvs)
+        rewards[done] = net / BET_CENTS
+        terminated = np.zeros(self.numEnvs, dtype=bool)
+        terminated[done] = True
+        info = {'finalUserTotal': userTotal, 'finalDealerTotal': dealerTotal, 'finishedLanes': done}
+
+        self.deal(done)
+        return self.observe(), rewards, terminated, np.zeros(self.numEnvs, dtype=bool), info
@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+
+''' odds.py -- exact probabilities and expected values for blackjack.py
+    Works on card compositions: tuples of ten counts for the point values
+    ace (1) through ten, with 10s, jacks, queens and kings merged. A composition
+    of None stands for an infinite deck, where every rank is equally likely.
+'''
+
+import functools
+import sys
+
+import blackjack
+
+# Constants
+
+DEALER_TOTALS = (17, 18, 19, 20, 21, 22) # 22 stands for a bust
+INFINITE_DECK = None
+INFINITE_WEIGHTS = (1/13,) * 9 + (4/13,) # Chance of drawing each point value from an infinite deck
+
+# Functions - compositions
+
+def shoeComposition(numDecks=1):
+    '''Return the composition of a full shoe of numDecks decks.'''
+    return (4 * numDecks,) * 9 + (16 * numDecks,)
+
+def compositionOf(codes):
+    '''Return the composition of an iterable of integer card codes, e.g. a Shoe's undealt cards.'''
+    counts = [0] * 10
+    for code in codes:
+        counts[blackjack.CODE_POINTS[code] - 1] += 1
+    return tuple(counts)
+
+def removeCards(composition, *points):
+    '''Return the composition left after drawing cards with the given point values (aces are 1).'''
+    if composition is INFINITE_DECK:
+        return composition
+    counts = list(composition)
+    for point in points:
+        counts[point - 1] -= 1
+    return tuple(counts)
+
+def drawChances(composition):
+    '''Yield (point value, probability, composition after the draw) for every possible next card.'''
+    if composition is INFINITE_DECK:
+        for index, weight in enumerate(INFINITE_WEIGHTS):
+            yield index + 1, weight, composition
+        return
+    remaining = sum(composition)
+    for index, count in enumerate(composition):
+        if count:
+            counts = list(composition)
+            counts[index] -= 1
+            yield index + 1, count / remaining, tuple(counts)
+
+# Functions - dealer outcomes
+
+@functools.lru_cache(maxsize=None)
+def dealerOutcomes(hardTotal, hasAce, composition, hitSoft17=False):
+    '''Return the chances of each DEALER_TOTALS outcome for a dealer holding the given
+    hard total (aces as 1) who keeps hitting below 17 (and on a soft 17 with hitSoft17)
+    from the given composition.'''
+    if hardTotal > 21:
+        return (0.0,) * 5 + (1.0,)
+    value = hardTotal + 10 if hasAce and hardTotal <= 11 else hardTotal
+    if value > 17 or value == 17 and not (hitSoft17 and hardTotal == 7):
+        return tuple(float(value == total) for total in DEALER_TOTALS)
+
+    chances = [0.0] * len(DEALER_TOTALS)
+    for point, chance, rest in drawChances(composition):
+        for index, outcome in enumerate(dealerOutcomes(hardTotal + point, hasAce or point == 1, rest, hitSoft17)):
+            chances[index] += chance * outcome
+    return tuple(chances)
+
+@functools.lru_cache(maxsize=None)
+def dealerDraws(upcard, peek=False, hitSoft17=False):
+    '''Return every way the dealer can draw from an upcard (point value, aces are 1) to
+    a final total, as (cards, number of cards, DEALER_TOTALS index, orderings) tuples
+    where cards holds (point value - 1, count) pairs and orderings counts the draw
+    orders that play out this way, shortest first. With peek the first card drawn
+    cannot complete a blackjack. Drawing a given set of cards in any order is equally
+    likely from any composition, so this is enumerated once and valued per
+    composition by compositionOutcomes().'''
+    excluded = 11 - upcard if peek and upcard in (1, 10) else None
+    found = {}
+    stack = [(upcard, upcard == 1, (0,) * 10)]
+    while stack:
+        hardTotal, hasAce, drawn = stack.pop()
+        value = hardTotal + 10 if hasAce and hardTotal <= 11 else hardTotal
+        if hardTotal > 21 or value > 17 or value == 17 and not (hitSoft17 and hardTotal == 7):
+            key = (drawn, 5 if hardTotal > 21 else value - 17)
+            found[key] = found.get(key, 0) + 1
+            continue
+        for point in range(1, 11):
+            if point == excluded and not any(drawn):
+                continue
+            counts = list(drawn)
+            counts[point - 1] += 1
+            stack.append((hardTotal + point, hasAce or point == 1, tuple(counts)))
+    return tuple(sorted(((tuple((index, count) for index, count in enumerate(drawn) if count), sum(drawn), outcome, orderings)
+                         for (drawn, outcome), orderings in found.items()), key=lambda draw: draw[1]))
+
+def compositionOutcomes(draws, composition):
+    '''Return the chances of each DEALER_TOTALS outcome over the dealerDraws() of a finite
+    composition: a set of cards comes out in a given order with the chance
+    count!/(count - m)! for each point value drawn m times over remaining!/(remaining - n)!.'''
+    longest = draws[-1][1]
+    remaining = sum(composition)
+    falling = [1.0]
+    for drawn in range(longest):
+        falling.append(falling[-1] * (remaining - drawn))
+    perCard = []
+    for count in composition:
+        row = [1.0]
+        for drawn in range(longest):
+            row.append(row[-1] * (count - drawn))
+        perCard.append(row)
+    chances = [0.0] * len(DEALER_TOTALS)
+    for cards, drawn, outcome, orderings in draws:
+        chance = orderings
+        for index, count in cards:
+            chance *= perCard[index][count]
+        chances[outcome] += chance / falling[drawn]
+    return chances
+
+@functools.lru_cache(maxsize=None)
+def dealerProbabilities(upcard, composition=INFINITE_DECK, peek=False, hitSoft17=False):
+    '''Return the chances of the dealer finishing on 17, 18, 19, 20, 21 or busting,
+    given the upcard's point value (aces are 1) and the composition of the cards the
+    hole card and hits come from (with the upcard and any known cards already removed).
+    With peek, the dealer is known not to hold a blackjack, as whenever the player
+    gets to act in playRound(), so a hole card completing one is ruled out.
+    Finite compositions are valued from dealerDraws() rather than by recursing over
+    every composition the dealer can reach, and results are cached, so repeated
+    queries cost a dictionary lookup.'''
+    peek = peek and upcard in (1, 10)
+    if composition is not INFINITE_DECK:
+        chances = compositionOutcomes(dealerDraws(upcard, peek, hitSoft17), composition)
+        if peek:
+            allowed = 1.0 - composition[10 - upcard] / sum(composition) # Not the hole card that would make a blackjack
+            chances = [chance / allowed for chance in chances]
+        return tuple(chances)
+    if not peek:
+        return dealerOutcomes(upcard, upcard == 1, composition, hitSoft17)
+    chances = [0.0] * len(DEALER_TOTALS)
+    excluded = 11 - upcard # The hole card that would make a blackjack
+    allowed = 1.0 - sum(chance for point, chance, _ in drawChances(composition) if point == excluded)
+    for point, chance, rest in drawChances(composition):
+        if point != excluded:
+            for index, outcome in enumerate(dealerOutcomes(upcard + point, upcard == 1 or point == 1, rest, hitSoft17)):
+                chances[index] += chance / allowed * outcome
+    return tuple(chances)
+
+# Functions - player expected values
+# Every value is in units of the initial bet. The player's hand is described by its hard
+# total (aces as 1) and whether it holds an ace, which together with the composition of
+# the unseen cards is all that matters, so these caches act as transposition tables.
+# Naturals are settled before the player acts, so the dealer is known not to have one.
+# The house rules come in as a blackjack.Rules, which is hashable like the compositions.
+
+def handTotal(hardTotal, hasAce):
+    return hardTotal + 10 if hasAce and hardTotal <= 11 else hardTotal
+
+@functools.lru_cache(maxsize=None)
+def standValue(playerTotal, upcard, composition, rules=blackjack.DEFAULT_RULES):
+    '''Expected value of standing on a total against the upcard (aces are 1).'''
+    if playerTotal > 21:
+        return -1.0
+    value = 0.0
+    for total, chance in zip(DEALER_TOTALS, dealerProbabilities(upcard, composition, True, rules.hitSoft17)):
+        if total > 21 or total < playerTotal:
+            value += chance
+        elif total > playerTotal:
+            value -= chance
+    return value
+
+@functools.lru_cache(maxsize=None)
+def hitValue(hardTotal, hasAce, upcard, composition, rules=blackjack.DEFAULT_RULES):
+    '''Expected value of hitting once and then hitting or standing optimally.
+    Like playRound(), a hand that reaches 21 stands automatically.'''
+    value = 0.0
+    for point, chance, rest in drawChances(composition):
+        hard = hardTotal + point
+        ace = hasAce or point == 1
+        total = handTotal(hard, ace)
+        if total >= 21:
+            value += chance * standValue(total, upcard, rest, rules)
+        else:
+            value += chance * max(standValue(total, upcard, rest, rules), hitValue(hard, ace, upcard, rest, rules))
+    return value
+
+@functools.lru_cache(maxsize=None)
+def doubleValue(hardTotal, hasAce, upcard, composition, rules=blackjack.DEFAULT_RULES):
+    '''Expected value of doubling the bet, drawing exactly one card and standing.'''
+    value = 0.0
+    for point, chance, rest in drawChances(composition):
+        value += chance * standValue(handTotal(hardTotal + point, hasAce or point == 1), upcard, rest, rules)
+    return 2 * value
+
+def canDoubleOn(hardTotal, hasAce, rules=blackjack.DEFAULT_RULES):
+    '''True if the rules allow doubling down on a two-card hand with this hard total.'''
+    return bool(rules.doubleStates[hardTotal * 2 + hasAce])
+
+@functools.lru_cache(maxsize=None)
+def splitValue(point, upcard, composition, rules=blackjack.DEFAULT_RULES):
+    '''Expected value of splitting a pair with the given point value: each hand starts
+    from one card, draws its second and is played on like playRound() does (split aces
+    take one card, doubling after a split if allowed). Resplitting is not counted and
+    both hands draw from the same composition, so this slightly undervalues splitting.'''
+    value = 0.0
+    for drawn, chance, rest in drawChances(composition):
+        hard = point + drawn
+        ace = point == 1 or drawn == 1
+        total = handTotal(hard, ace)
+        if total >= 21 or (point == 1 and rules.splitAcesOneCard):
+            value += chance * standValue(total, upcard, rest, rules)
+            continue
+        options = [standValue(total, upcard, rest, rules), hitValue(hard, ace, upcard, rest, rules)]
+        if rules.doubleAfterSplit and canDoubleOn(hard, ace, rules):
+            options.append(doubleValue(hard, ace, upcard, rest, rules))
+        value += chance * max(options)
+    return 2 * value
+
+def moveValues(hardTotal, hasAce, upcard, composition=INFINITE_DECK, canDouble=True, canSplit=False,
+               canSurrender=False, rules=blackjack.DEFAULT_RULES):
+    '''Return the expected value of each available move ('S', 'H' and, if allowed, 'D',
+    'P' for splitting a pair and 'R' for surrendering). The composition must already
+    exclude the player's cards and the dealer's upcard.'''
+    total = handTotal(hardTotal, hasAce)
+    values = {'S': standValue(total, upcard, composition, rules)}
+    if total < 21:
+        values['H'] = hitValue(hardTotal, hasAce, upcard, composition, rules)
+        if canDouble and canDoubleOn(hardTotal, hasAce, rules):
+            values['D'] = doubleValue(hardTotal, hasAce, upcard, composition, rules)
+    if canSplit:
+        values['P'] = splitValue(hardTotal // 2, upcard, composition, rules)
+    if canSurrender and rules.surrender:
+        values['R'] = -0.5
+    return values
+
+def handMoveValues(userHand, dealerHand, shoe=None, rules=blackjack.DEFAULT_RULES):
+    '''moveValues() for the player's blackjack.Hand against the dealer's Hand as dealt by
+    playRound(), using the cards the player cannot see (the shoe's undealt cards plus
+    the dealer's hole card) as the composition, or an infinite deck without a shoe.'''
+    composition = INFINITE_DECK
+    if shoe is not None:
+        composition = compositionOf(list(shoe.codes[shoe.pointer:]) + [dealerHand[0].code])
+    return moveValues(userHand.hardTotal, userHand.aces > 0, blackjack.CODE_POINTS[dealerHand[1].code],
+                      composition, len(userHand) == 2, blackjack.canSplitHand(userHand), len(userHand) == 2, rules)
+
+def clearCaches():
+    '''Forget every cached result, e.g. between long runs over many shoe compositions.'''
+    for function in (dealerOutcomes, dealerDraws, dealerProbabilities, standValue, hitValue, doubleValue, splitValue):
+        function.cache_clear()
+
+def printDealerTable(composition=INFINITE_DECK, hitSoft17=False):
+    print(f'{"UPCARD":<8}' + ''.join(f'{"BUST" if total == 22 else total:>8}' for total in DEALER_TOTALS))
+    for upcard in range(2, 12):
+        point = 1 if upcard == 11 else upcard
+        rest = removeCards(composition, point)
+        print(f'{"A" if upcard == 11 else upcard:<8}' + ''.join(f'{chance:>8.4f}' for chance in dealerProbabilities(point, rest, False, hitSoft17)))
+
+# Main Execution
+
+if __name__ == '__main__':
+    printDealerTable(shoeComposition(int(sys.argv[1])) if len(sys.argv) > 1 else INFINITE_DECK)
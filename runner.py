@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+
+''' runner.py -- multi-process Monte Carlo runner for simulate.py
+    Splits a simulation into fixed-size shards, plays them across a process pool
+    and merges the results. Every shard draws from its own child of one
+    numpy.random.SeedSequence, so the streams are statistically independent and a
+    given seed produces bit-identical results no matter how many workers run it.
+'''
+
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import blackjack
+import simulate
+
+# Constants
+
+SHARD_ROUNDS = 1_000_000 # Fixed so the shard layout (and thus the result) never depends on the worker count
+
+# Functions
+
+def shardSizes(rounds, shardRounds=SHARD_ROUNDS):
+    '''Split a number of rounds into shards of shardRounds, with any remainder last.'''
+    return [min(shardRounds, rounds - start) for start in range(0, rounds, shardRounds)]
+
+def runShard(rounds, policy, numDecks, penetration, seedSequence, rules=blackjack.DEFAULT_RULES):
+    '''Play one shard; module-level so it can be sent to worker processes.'''
+    return simulate.simulate(rounds, policy, numDecks, penetration, seed=seedSequence, rules=rules)
+
+def runParallel(rounds, policy=simulate.dealerPolicy, numDecks=None, penetration=None, seed=0, workers=None, shardRounds=SHARD_ROUNDS, precision=None,
+                rules=blackjack.DEFAULT_RULES):
+    '''Play rounds across a process pool and return the merged SimulationResult.
+
+    policy must be picklable (e.g. a module-level function). numDecks defaults to
+    rules.numDecks, as in simulate.simulate(). workers defaults to
+    every core; with workers=1 the shards run in this process. With a precision
+    (see simulate.simulate), rounds is an upper bound and shards stop being merged
+    once the 95% interval is narrow enough; the check happens in shard order, so
+    the result still does not depend on the worker count.
+    '''
+    sizes = shardSizes(rounds, shardRounds)
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    args = (sizes, [policy] * len(sizes), [numDecks] * len(sizes), [penetration] * len(sizes), seeds, [rules] * len(sizes))
+
+    start = time.perf_counter()
+    pool = None if workers == 1 else ProcessPoolExecutor(workers)
+    try:
+        shards = map(runShard, *args) if pool is None else pool.map(runShard, *args)
+
+        # Merge in shard order so floating-point sums are identical for any worker count
+        result = simulate.SimulationResult()
+        for shard in shards:
+            result.merge(shard)
+            if precision is not None and 2 * result.interval() < precision:
+                break
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+    result.elapsed = time.perf_counter() - start
+    return result
+
+# Main Execution
+
+if __name__ == '__main__':
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000_000
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    seed = int(sys.argv[3]) if len(sys.argv) > 3 else 0
+    simulate.report(runParallel(rounds, simulate.TablePolicy(), penetration=blackjack.PENETRATION, seed=seed, workers=workers))
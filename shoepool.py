@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+
+''' shoepool.py -- pre-shuffled shoes on disk for blackjack.py
+    Generates large numbers of shuffled shoes as rows of uint8 card codes in a
+    .npy file, and reads them back through a memory map so that simulations can
+    replay identical shoes without paying for shuffling.
+'''
+
+import sys
+
+import numpy as np
+
+import blackjack
+import simulate
+
+# Constants
+
+CHUNK_SHOES = 100_000 # Shoes shuffled and written at a time while generating
+
+# Classes
+
+class ShoePool:
+    '''A memory-mapped file of pre-shuffled shoes, handed out in order as zero-copy views.
+    When every shoe has been used the pool starts again from the first one.'''
+    def __init__(self, path):
+        self.shoes = np.load(path, mmap_mode='r')
+        self.numDecks = self.shoes.shape[1] // 52
+        self.position = 0
+
+    def __len__(self):
+        return len(self.shoes)
+
+    def take(self, count):
+        '''Return the next count shoes as a read-only (count, cards) array.'''
+        if self.position + count <= len(self.shoes):
+            shoes = self.shoes[self.position:self.position + count]
+            self.position += count
+            return shoes
+        indices = np.arange(self.position, self.position + count) % len(self.shoes)
+        self.position = (self.position + count) % len(self.shoes)
+        return self.shoes[indices]
+
+class PooledShoe(blackjack.Shoe):
+    '''A blackjack.Shoe that deals pre-shuffled shoes from a ShoePool instead of
+    shuffling its own cards.'''
+    def __init__(self, pool, penetration=blackjack.PENETRATION, counters=()):
+        self.pool = pool
+        super().__init__(pool.numDecks, penetration, counters=counters)
+
+    def shuffle(self):
+        self.codes = memoryview(self.pool.take(1)[0])
+        self.pointer = 0
+        for counter in self.counters:
+            counter.reset(len(self.codes))
+
+# Functions
+
+def generateShoePool(path, numShoes, numDecks=blackjack.NUM_DECKS, seed=None):
+    '''Write numShoes independently shuffled shoes of numDecks decks to a .npy file.'''
+    rng = np.random.default_rng(seed)
+    shoes = np.lib.format.open_memmap(path, mode='w+', dtype=np.uint8, shape=(numShoes, 52 * numDecks))
+    for start in range(0, numShoes, CHUNK_SHOES):
+        count = min(CHUNK_SHOES, numShoes - start)
+        shoes[start:start + count] = simulate.shuffledShoes(rng, count, numDecks)
+    shoes.flush()
+
+# Main Execution
+
+if __name__ == '__main__':
+    if len(sys.argv) < 3:
+        print('Usage: python shoepool.py PATH NUMSHOES [DECKS] [SEED]')
+        sys.exit(1)
+    numDecks = int(sys.argv[3]) if len(sys.argv) > 3 else blackjack.NUM_DECKS
+    seed = int(sys.argv[4]) if len(sys.argv) > 4 else None
+    generateShoePool(sys.argv[1], int(sys.argv[2]), numDecks, seed)
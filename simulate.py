@@ -0,0 +1,477 @@
+#!/usr/bin/env python3
+
+''' simulate.py -- batch simulation for blackjack.py
+    Plays many independent rounds at once on NumPy arrays, one round per lane,
+    under the same blackjack.Rules as playRound(): the dealer settles naturals
+    at once, the player may double down on their first two cards, split pairs and
+    (if the rules allow) surrender, and ties return the bet. Batch players never
+    take insurance.
+'''
+
+import dataclasses
+import functools
+import sys
+import time
+
+import numpy as np
+
+import blackjack
+import odds
+import strategy
+
+# Constants - player actions
+
+STAND     = 0
+HIT       = 1
+DOUBLE    = 2
+SPLIT     = 3
+SURRENDER = 4
+
+# Constants - lookup tables
+# TRANSITION[state, code] is the hand state after drawing a card (see blackjack.HAND_TRANSITION)
+
+TRANSITION  = np.frombuffer(blackjack.HAND_TRANSITION, dtype=np.uint8).reshape(blackjack.NUM_STATES, 52)
+STATE_VALUE = np.frombuffer(blackjack.STATE_VALUE, dtype=np.uint8)
+STATE_SOFT  = np.frombuffer(blackjack.STATE_SOFT, dtype=np.uint8).astype(bool)
+UPCARD      = np.array([11 if value == 14 else min(10, value) for value in blackjack.CODE_VALUE], dtype=np.uint8) # Aces are 11
+
+# SETTLE_SIGN[user total, dealer total] is the even-money result of blackjack.settleRound() per unit bet
+SETTLE_SIGN = np.array([[blackjack.settleRound(user, dealer, 1)[1] for dealer in range(23)] for user in range(23)], dtype=np.int64)
+
+# The batch action for each strategy.py table action, and for when it cannot double down or surrender
+TABLE_MOVES    = np.array([STAND, HIT, DOUBLE, DOUBLE, SURRENDER, SURRENDER])
+TABLE_FALLBACK = np.array([STAND, HIT, HIT, STAND, HIT, STAND])
+
+# Classes
+
+@dataclasses.dataclass
+class RunningStats:
+    '''Mean and variance of a stream of values in constant memory (Welford's
+    running mean and sum of squared deviations, merged with Chan's formula).'''
+    rounds: int = 0
+    mean: float = 0.0
+    m2: float = 0.0
+
+    @property
+    def stdev(self):
+        return (self.m2 / (self.rounds - 1)) ** 0.5 if self.rounds > 1 else 0.0
+
+    def interval(self, z=1.96):
+        '''Return the half-width of the confidence interval of the mean (95% by default).'''
+        return z * self.stdev / self.rounds ** 0.5 if self.rounds else float('inf')
+
+    def merge(self, other):
+        '''Add another set of statistics into this one and return it.'''
+        rounds = self.rounds + other.rounds
+        if rounds:
+            delta = other.mean - self.mean
+            self.m2 += other.m2 + delta * delta * self.rounds * other.rounds / rounds
+            self.mean += delta * other.rounds / rounds
+        self.rounds = rounds
+        return self
+
+    def addValues(self, values):
+        '''Fold an array of values into the statistics.'''
+        mean = float(values.mean())
+        return RunningStats.merge(self, RunningStats(len(values), mean, float(((values - mean) ** 2).sum())))
+
+@dataclasses.dataclass
+class SimulationResult(RunningStats):
+    '''Aggregate results of a batch simulation.
+
+    Everything is kept in constant memory: the per-round net result (in units of
+    the initial bet) as RunningStats, the exact net result in cents, the outcome
+    counts, and histograms of final totals indexed by total (22 is a bust). Wins,
+    losses and ties count rounds; busts and userTotals count hands, split or not.
+    '''
+    betCents: int = 100
+    netCents: int = 0
+    wins: int = 0
+    losses: int = 0
+    ties: int = 0
+    busts: int = 0
+    dealerBusts: int = 0
+    doubles: int = 0
+    hands: int = 0
+    splits: int = 0
+    blackjacks: int = 0
+    surrenders: int = 0
+    userTotals: list = dataclasses.field(default_factory=lambda: [0] * 23)
+    dealerTotals: list = dataclasses.field(default_factory=lambda: [0] * 23)
+    elapsed: float = 0.0
+
+    @property
+    def net(self):
+        '''Net result in initial bets, exact like netCents.'''
+        return self.netCents / self.betCents
+
+    @property
+    def roundsPerSec(self):
+        return self.rounds / self.elapsed if self.elapsed else float('inf')
+
+    def merge(self, other):
+        '''Add another result into this one and return it.'''
+        super().merge(other)
+        for name in ('netCents', 'wins', 'losses', 'ties', 'busts', 'dealerBusts', 'doubles', 'hands', 'splits', 'blackjacks', 'surrenders', 'elapsed'):
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+        self.userTotals = [mine + theirs for mine, theirs in zip(self.userTotals, other.userTotals)]
+        self.dealerTotals = [mine + theirs for mine, theirs in zip(self.dealerTotals, other.dealerTotals)]
+        return self
+
+    def add(self, net, userTotals, dealerTotal, doubled, split, natural, surrendered):
+        '''Fold one playBatch() result (net results in cents) into the aggregates.'''
+        self.addValues(net / self.betCents)
+        self.netCents += int(net.sum())
+        self.wins += int((net > 0).sum())
+        self.losses += int((net < 0).sum())
+        self.ties += int((net == 0).sum())
+        userTotal = userTotals[userTotals > 0]
+        self.hands += len(userTotal)
+        self.busts += int((userTotal > 21).sum())
+        self.dealerBusts += int((dealerTotal > 21).sum())
+        self.doubles += int(doubled.sum())
+        self.splits += int(split.sum())
+        self.blackjacks += int((natural & (userTotals[:, 0] == 21)).sum())
+        self.surrenders += int(surrendered.sum())
+        self.userTotals = (np.bincount(userTotal, minlength=23) + self.userTotals).tolist()
+        self.dealerTotals = (np.bincount(dealerTotal, minlength=23) + self.dealerTotals).tolist()
+        return self
+
+class TablePolicy:
+    '''Batch policy that follows a strategy.py table, by default basic strategy for the
+    rules it will be played under (picklable, so runner.py can ship it).'''
+    def __init__(self, table=None, rules=blackjack.DEFAULT_RULES):
+        self.table = strategy.basicStrategy(odds.INFINITE_DECK, rules) if table is None else table
+        actions = np.frombuffer(self.table, dtype=np.uint8)
+        self.actions = actions[:strategy.PAIR_OFFSET].reshape(strategy.TOTALS, 2, strategy.UPCARDS)
+        self.pairs = actions[strategy.PAIR_OFFSET:].reshape(strategy.UPCARDS, strategy.UPCARDS)
+
+    def __reduce__(self):
+        return (TablePolicy, (self.table,))
+
+    def __call__(self, total, soft, upcard, canDouble, pair, canSurrender):
+        action = self.actions[total, soft.astype(np.uint8), upcard]
+        allowed = np.where(action >= strategy.SURRENDER, canSurrender, canDouble)
+        action = np.where(allowed, TABLE_MOVES[action], TABLE_FALLBACK[action])
+        return np.where(self.pairs[pair, upcard] != 0, SPLIT, action)
+
+# Functions - strategies
+
+def dealerPolicy(total, soft, upcard, canDouble, pair, canSurrender):
+    '''Mimic the dealer: hit below 17 and never double down, split or surrender.'''
+    return np.where(total < 17, HIT, STAND)
+
+# Functions - simulation
+
+def batchShuffle(rng, items, count, positions=None):
+    '''Return a (count, len(items)) array whose rows are independent uniform permutations of items.
+
+    All rows are shuffled together by a batched Fisher-Yates pass that fills one
+    position of every row per step. If positions is given only the first that many
+    positions are drawn (uniformly); the rest of each row holds the undrawn items in
+    no particular order, which is all a caller that deals no further needs.
+    '''
+    width = len(items)
+    steps = width - 1 if positions is None else min(positions, width - 1)
+    rows = np.empty((count, width), dtype=np.asarray(items).dtype)
+    rows[:] = items
+    cells = rows.reshape(-1) # Flat indexing keeps every swap inside its own contiguous row
+    starts = np.arange(count) * width
+    for position in range(steps):
+        swap = starts + rng.integers(position, width, size=count)
+        drawn = cells[swap]
+        cells[swap] = cells[starts + position]
+        cells[starts + position] = drawn
+    return rows
+
+def shuffledShoes(rng, lanes, numDecks=1, cards=None):
+    '''Return a (lanes, 52 * numDecks) uint8 array with one shuffled shoe of card codes per row.
+    With cards, only the first that many cards of each shoe are guaranteed to be shuffled.'''
+    return batchShuffle(rng, np.frombuffer(blackjack.newDeckCodes(numDecks), dtype=np.uint8), lanes, cards)
+
+@functools.lru_cache(maxsize=None)
+def ruleTables(rules):
+    '''Return the compiled dealerStands and doubleStates tables of a blackjack.Rules
+    as NumPy boolean arrays over hand states, built once per Rules.'''
+    return (np.frombuffer(rules.dealerStands, dtype=np.uint8).astype(bool),
+            np.frombuffer(rules.doubleStates, dtype=np.uint8).astype(bool))
+
+def playDealer(shoes, pointer, dealerState, active=None, rules=blackjack.DEFAULT_RULES):
+    '''Complete the dealer's hand in every active lane at once and return the final
+    totals (22 for a bust) and the bust mask.
+
+    dealerState holds each lane's dealer hand state and pointer its next card index
+    in its row of shoes; both are updated in place. Every pass draws one card for
+    each lane still hitting under the rules and drops lanes as they stand or bust.
+    Lanes outside the active mask (by default every lane is active) keep their hands.
+    '''
+    dealerStands = ruleTables(rules)[0]
+    width = shoes.shape[1]
+    lanes = np.arange(len(dealerState))
+    hitting = ~dealerStands[dealerState]
+    if active is not None:
+        hitting &= active
+    while hitting.any():
+        live = lanes[hitting]
+        dealerState[live] = TRANSITION[dealerState[live], shoes[live, pointer[live] % width]]
+        pointer[live] += 1
+        hitting[live] = ~dealerStands[dealerState[live]]
+    total = STATE_VALUE[dealerState]
+    return total, total > 21
+
+def settleBatch(userTotal, dealerTotal, bet, doubled=False, natural=False, dealerBlackjack=False, surrendered=False,
+                rules=blackjack.DEFAULT_RULES):
+    '''Return the per-lane net results in int64 cents, exactly like blackjack.settleRound()
+    and settleNaturals().
+
+    userTotal holds each lane's final player total (22 for a bust), or a
+    (lanes, hands) array with one column per split hand; bet (in cents) and the
+    doubled mask broadcast against it. natural (the player's blackjack),
+    dealerBlackjack and surrendered are per-lane masks that override the hands
+    with the rules' payouts on the first hand's bet. Even-money results are one
+    SETTLE_SIGN lookup per hand.
+    '''
+    userTotal = np.asarray(userTotal)
+    dealerTotal = np.asarray(dealerTotal)
+    perHand = userTotal.ndim == 2
+    bet = np.broadcast_to(np.asarray(bet, dtype=np.int64), userTotal.shape)
+    net = SETTLE_SIGN[userTotal, dealerTotal[:, None] if perHand else dealerTotal] * bet * (1 + np.asarray(doubled))
+    if perHand:
+        net = net.sum(axis=1)
+        bet = bet[:, 0]
+    net = np.where(surrendered, rules.surrenderNet(bet), net)
+    return np.select([natural & dealerBlackjack, dealerBlackjack, natural], [0, -bet, rules.blackjackNet(bet)], net)
+
+def playBatch(shoes, policy=dealerPolicy, pointer=None, betCents=100, rules=blackjack.DEFAULT_RULES):
+    '''Play one round under the given Rules in every lane, each dealing from its own row of shoes.
+
+    The player's hands in each lane form a compact hand tree: up to
+    rules.maxHands columns of hand states in the order playRound() plays
+    them, with current pointing at the hand being played. Splitting shifts the
+    later hands one column right, so every lane draws its cards in exactly the
+    same order as playRound(). A policy is called as policy(total, soft, upcard,
+    canDouble, pair, canSurrender), where pair is the card value (aces as 11) of a
+    hand that may be split and 0 otherwise, and returns STAND, HIT, DOUBLE, SPLIT
+    or SURRENDER per lane. The rules only enter through their compiled tables and
+    lane-wide masks, so no rule costs a branch per hand.
+
+    pointer optionally holds each lane's next card index and is advanced in
+    place; by default every lane deals from the start of its shoe. Returns the
+    per-lane net results (int64 cents for an initial bet of betCents), the
+    player's final totals (lanes x maxHands, 0 for hands not played), the
+    dealer's final totals and the masks of lanes that doubled, split, were
+    settled on a natural and surrendered.
+    '''
+    doubleStates = ruleTables(rules)[1]
+    lanes = np.arange(len(shoes))
+    width = shoes.shape[1]
+    if pointer is None:
+        pointer = np.zeros(len(shoes), dtype=np.intp)
+
+    def draw(live):
+        cards = shoes[live, pointer[live] % width]
+        pointer[live] += 1
+        return cards
+
+    # Deal to the both user and player; the dealer's second card is the upcard
+    first = shoes[lanes[:, None], (pointer[:, None] + np.arange(4)) % width]
+    dealerState = TRANSITION[TRANSITION[blackjack.START_STATE, first[:, 0]], first[:, 1]]
+    upcard = UPCARD[first[:, 1]]
+    pointer += 4
+
+    # The hand tree, one column per hand
+    hands = rules.maxHands
+    userState = np.zeros((len(shoes), hands), dtype=np.uint8)
+    userState[:, 0] = TRANSITION[TRANSITION[blackjack.START_STATE, first[:, 2]], first[:, 3]]
+    cardCount = np.zeros((len(shoes), hands), dtype=np.uint8)
+    cardCount[:, 0] = 2
+    firstCard = np.zeros((len(shoes), hands), dtype=np.uint8)
+    firstCard[:, 0] = first[:, 2]
+    secondCard = np.zeros((len(shoes), hands), dtype=np.uint8)
+    secondCard[:, 0] = first[:, 3]
+    bet = np.zeros((len(shoes), hands), dtype=np.int64)
+    bet[:, 0] = betCents
+    doubledHand = np.zeros((len(shoes), hands), dtype=bool)
+    numHands = np.ones(len(shoes), dtype=np.intp)
+    current = np.zeros(len(shoes), dtype=np.intp)
+    doubled = np.zeros(len(shoes), dtype=bool)
+    surrendered = np.zeros(len(shoes), dtype=bool)
+
+    # The dealer checks for a blackjack, so naturals end the round at once
+    userNatural = STATE_VALUE[userState[:, 0]] == 21
+    dealerNatural = STATE_VALUE[dealerState] == 21
+    natural = userNatural | dealerNatural
+
+    # Handle player actions hand by hand, dropping lanes once their last hand is finished
+    current[natural] = 1 # Lanes settled on a natural have no hands left to play
+    active = ~natural
+    while active.any():
+        live = lanes[active]
+
+        # A split hand receives its second card on its turn
+        single = live[cardCount[live, current[live]] == 1]
+        column = current[single]
+        card = draw(single)
+        userState[single, column] = TRANSITION[userState[single, column], card]
+        secondCard[single, column] = card
+        cardCount[single, column] = 2
+
+        # Move past hands on 21 or more and split aces that have their one card
+        column = current[live]
+        state = userState[live, column]
+        splitAces = (numHands[live] > 1) & (UPCARD[firstCard[live, column]] == 11) & rules.splitAcesOneCard
+        finished = (STATE_VALUE[state] >= 21) | splitAces
+        current[live[finished]] += 1
+        live = live[~finished]
+
+        column = current[live]
+        state = userState[live, column]
+        twoCards = cardCount[live, column] == 2
+        canDouble = twoCards & doubleStates[state] & ((numHands[live] == 1) | rules.doubleAfterSplit)
+        pairValue = UPCARD[firstCard[live, column]]
+        canSplit = twoCards & (pairValue == UPCARD[secondCard[live, column]]) & (numHands[live] < hands)
+        canSurrender = twoCards & (numHands[live] == 1) & rules.surrender
+        action = policy(STATE_VALUE[state], STATE_SOFT[state], upcard[live], canDouble, np.where(canSplit, pairValue, 0), canSurrender)
+        action = np.where((action == SPLIT) & ~canSplit, HIT, action)
+        action = np.where((action == DOUBLE) & ~canDouble, HIT, action)
+        action = np.where((action == SURRENDER) & ~canSurrender, HIT, action)
+        surrendered[live[action == SURRENDER]] = True
+
+        # Split: shift the later hands right and start two hands from one card each
+        splitting = live[action == SPLIT]
+        if len(splitting):
+            column = current[splitting]
+            source = np.arange(hands) - (np.arange(hands) > column[:, None] + 1)
+            for array in (userState, cardCount, firstCard, secondCard, bet, doubledHand):
+                array[splitting] = array[splitting[:, None], source]
+            pair = np.stack([firstCard[splitting, column], secondCard[splitting, column]], axis=1)
+            for offset in (0, 1):
+                userState[splitting, column + offset] = TRANSITION[blackjack.START_STATE, pair[:, offset]]
+                firstCard[splitting, column + offset] = pair[:, offset]
+                cardCount[splitting, column + offset] = 1
+            bet[splitting, column + 1] = bet[splitting, column]
+            numHands[splitting] += 1
+
+        drawing = live[(action == HIT) | (action == DOUBLE)]
+        column = current[drawing]
+        userState[drawing, column] = TRANSITION[userState[drawing, column], draw(drawing)]
+        cardCount[drawing, column] += 1
+        doubling = live[action == DOUBLE]
+        doubledHand[doubling, current[doubling]] = True
+        doubled[doubling] = True
+
+        current[live[(action == STAND) | (action == DOUBLE) | (action == SURRENDER)]] += 1
+        active = current < numHands
+
+    # Dealer's actions
+    dealerTotal = playDealer(shoes, pointer, dealerState, ~natural, rules)[0]
+
+    # Handle final results
+    userTotal = np.where(np.arange(hands) < numHands[:, None], STATE_VALUE[userState], 0)
+    net = settleBatch(userTotal, dealerTotal, bet, doubledHand, userNatural, dealerNatural, surrendered, rules)
+    return net, userTotal, dealerTotal, doubled, numHands > 1, natural, surrendered
+
+def simulate(rounds, policy=dealerPolicy, numDecks=None, penetration=None, seed=None, batchSize=100_000, pool=None, precision=None, betCents=100,
+             rules=blackjack.DEFAULT_RULES):
+    '''Play the given number of rounds under the given Rules in batches and return a SimulationResult.
+
+    Without a penetration every round is dealt from a freshly shuffled shoe of
+    numDecks decks (by default rules.numDecks). With one, each lane keeps playing through its own shoe and
+    reshuffles it once the cut card has come out, like blackjack.Shoe. Given a
+    shoepool.ShoePool, shoes come from the pool (and numDecks is ignored).
+    With a precision, rounds is only an upper bound: the simulation stops after
+    the first batch at which the 95% interval of the house edge is narrower than
+    precision (e.g. 0.001 for +/- 0.05%).
+    '''
+    rng = np.random.default_rng(seed)
+    if numDecks is None:
+        numDecks = rules.numDecks
+    if pool is None:
+        # A fresh shoe per round only ever deals from its first few cards
+        cards = blackjack.MAX_ROUND_CARDS if penetration is None else None
+        nextShoes = lambda count: shuffledShoes(rng, count, numDecks, cards)
+    else:
+        nextShoes = pool.take
+    result = SimulationResult(betCents=betCents)
+    if penetration is not None:
+        shoes = np.array(nextShoes(min(batchSize, rounds)))
+        pointer = np.zeros(len(shoes), dtype=np.intp)
+        cutCard = blackjack.cutCardIndex(shoes.shape[1], penetration)
+    start = time.perf_counter()
+    while result.rounds < rounds:
+        lanes = min(batchSize, rounds - result.rounds)
+        if penetration is None:
+            outcome = playBatch(nextShoes(lanes), policy, betCents=betCents, rules=rules)
+        else:
+            outcome = playBatch(shoes[:lanes], policy, pointer[:lanes], betCents, rules)
+            spent = np.flatnonzero(pointer >= cutCard)
+            shoes[spent] = nextShoes(len(spent))
+            pointer[spent] = 0
+        result.add(*outcome)
+        if precision is not None and 2 * result.interval() < precision:
+            break
+    result.elapsed = time.perf_counter() - start
+    return result
+
+def compare(rounds, policies, numDecks=None, seed=None, batchSize=100_000, pool=None, rules=blackjack.DEFAULT_RULES):
+    '''Play every entry against the very same freshly shuffled shoe each round (common
+    random numbers) and return (results, differences): a SimulationResult per entry
+    and, for every entry after the first, RunningStats of its per-round net result
+    minus the first entry's. policies maps a name to a batch policy, played under
+    rules, or to a (policy, Rules) pair, so rule sets can be compared as well as
+    strategies. Every entry shares the shoes, which hold numDecks decks (by default
+    rules.numDecks) whatever each entry's Rules say.'''
+    rng = np.random.default_rng(seed)
+    if numDecks is None:
+        numDecks = rules.numDecks
+    entries = {name: entry if isinstance(entry, tuple) else (entry, rules) for name, entry in policies.items()}
+    names = list(entries)
+    results = {name: SimulationResult() for name in names}
+    differences = {name: RunningStats() for name in names[1:]}
+    start = time.perf_counter()
+    played = 0
+    while played < rounds:
+        lanes = min(batchSize, rounds - played)
+        shoes = pool.take(lanes) if pool is not None else shuffledShoes(rng, lanes, numDecks, blackjack.MAX_ROUND_CARDS)
+        baseline = None
+        for name in names:
+            policy, entryRules = entries[name]
+            outcome = playBatch(shoes, policy, rules=entryRules)
+            results[name].add(*outcome)
+            if baseline is None:
+                baseline = outcome[0]
+            else:
+                differences[name].addValues((outcome[0] - baseline) / results[name].betCents)
+        played += lanes
+    for result in results.values():
+        result.elapsed = time.perf_counter() - start
+    return results, differences
+
+def reportComparison(results, differences):
+    '''Print each entry's house edge and the paired differences against the first entry.'''
+    names = list(results)
+    for name in names:
+        print(f'{name}: house edge {-results[name].mean:.4%} (95% CI +/- {results[name].interval():.4%})')
+    for name, difference in differences.items():
+        # How much independent runs of the same size would have spread the difference
+        independent = (results[name].stdev ** 2 + results[names[0]].stdev ** 2) ** 0.5
+        print(f'{name} - {names[0]}: {difference.mean:+.4%} per round (95% CI +/- {difference.interval():.4%}, '
+              f'variance {difference.stdev ** 2 / independent ** 2:.1%} of independent runs)')
+
+def report(result):
+    '''Print a short summary of a SimulationResult.'''
+    margin = result.interval()
+    print(f'Rounds played: {result.rounds:,} at {blackjack.formatCents(result.betCents)} a round')
+    print(f'Net result: {blackjack.formatCents(result.netCents)}')
+    print(f'House edge: {-result.mean:.4%} (95% CI +/- {margin:.4%})')
+    print(f'Wins: {result.wins / result.rounds:.2%}  Losses: {result.losses / result.rounds:.2%}  Ties: {result.ties / result.rounds:.2%}')
+    print(f'Player busts: {result.busts / result.hands:.2%} of hands  Dealer busts: {result.dealerBusts / result.rounds:.2%}  Doubles: {result.doubles / result.rounds:.2%}')
+    print(f'Splits: {result.splits / result.rounds:.2%}  Blackjacks: {result.blackjacks / result.rounds:.2%}  Surrenders: {result.surrenders / result.rounds:.2%}')
+    print('Dealer finishes: ' + '  '.join(f'{"bust" if total == 22 else total}: {result.dealerTotals[total] / result.rounds:.2%}' for total in range(17, 23)))
+    print(f'Throughput: {result.roundsPerSec:,.0f} rounds/sec')
+
+# Main Execution
+
+if __name__ == '__main__':
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    report(simulate(rounds, TablePolicy(), penetration=blackjack.PENETRATION))
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+
+''' strategy.py -- basic strategy for blackjack.py
+    Derives the optimal total-dependent strategy for a table's blackjack.Rules
+    (by default the dealer stands on 17, double down on any first two cards,
+    pairs may be split) from the expected values in odds.py, and stores it as a flat byte table so
+    that a decision is a single lookup.
+'''
+
+import functools
+import sys
+
+import blackjack
+import odds
+
+# Constants - table actions (STAND, HIT and DOUBLE match simulate.py)
+
+STAND              = 0
+HIT                = 1
+DOUBLE             = 2 # Double down if allowed, otherwise hit
+DOUBLE_OR_STAND    = 3 # Double down if allowed, otherwise stand
+SURRENDER          = 4 # Surrender if allowed, otherwise hit
+SURRENDER_OR_STAND = 5 # Surrender if allowed, otherwise stand
+MOVES              = ('S', 'H', 'D', 'D', 'R', 'R')
+FALLBACK_MOVES     = ('S', 'H', 'H', 'S', 'H', 'S') # When doubling or surrendering is not allowed
+
+# Constants - table layout
+# The table is indexed by [player total 0 - 21][soft flag][dealer upcard 0 - 11, aces as 11],
+# flattened to tableIndex(total, soft, upcard); unreachable entries are STAND. It is followed
+# by the pair section [pair card 0 - 11, aces as 11][dealer upcard], flattened to
+# pairIndex(pair, upcard), which is 1 where the pair should be split.
+
+TOTALS      = 22
+UPCARDS     = 12
+PAIR_OFFSET = TOTALS * 2 * UPCARDS
+
+# Functions
+
+def tableIndex(total, soft, upcard):
+    return (total * 2 + soft) * UPCARDS + upcard
+
+def pairIndex(pair, upcard):
+    return PAIR_OFFSET + pair * UPCARDS + upcard
+
+def bestAction(values):
+    '''Reduce the moveValues() of a two-card hand (without 'P') to a table action.'''
+    best = max(values, key=values.get)
+    hit = values.get('H', -1.0) >= values['S']
+    if best == 'D':
+        return DOUBLE if hit else DOUBLE_OR_STAND
+    if best == 'R':
+        return SURRENDER if hit else SURRENDER_OR_STAND
+    return HIT if best == 'H' else STAND
+
+@functools.lru_cache(maxsize=None)
+def basicStrategy(numDecks=odds.INFINITE_DECK, rules=blackjack.DEFAULT_RULES):
+    '''Generate the basic strategy table under the given Rules for a shoe of numDecks
+    decks (by default odds.INFINITE_DECK, an infinite deck; pass rules.numDecks for
+    the table's own shoe).
+
+    Each decision is made against the full shoe less the dealer's upcard, which is
+    what makes the strategy depend on the player's total rather than on their cards.
+    Finite shoes take 10 to 20 seconds and under 50 MB while the odds.py caches fill
+    (one dealer distribution per composition the player can reach); the result is
+    cached for the process. For the default rules the
+    infinite-deck table is identical to the six-deck one and takes a fraction of a
+    second, so it is what the players below use unless given a table.
+    '''
+    table = bytearray(PAIR_OFFSET + UPCARDS * UPCARDS)
+    shoe = odds.INFINITE_DECK if numDecks is odds.INFINITE_DECK else odds.shoeComposition(numDecks)
+    for upcard in range(2, 12):
+        point = 1 if upcard == 11 else upcard
+        composition = odds.removeCards(shoe, point)
+        for total in range(4, 21):
+            table[tableIndex(total, False, upcard)] = bestAction(odds.moveValues(total, False, point, composition, True, False, True, rules))
+        for total in range(12, 21):
+            table[tableIndex(total, True, upcard)] = bestAction(odds.moveValues(total - 10, True, point, composition, True, False, True, rules))
+        for pair in range(2, 12):
+            pairPoint = 1 if pair == 11 else pair
+            values = odds.moveValues(2 * pairPoint, pair == 11, point, odds.removeCards(composition, pairPoint, pairPoint), True, True, True, rules)
+            table[pairIndex(pair, upcard)] = max(values, key=values.get) == 'P'
+        odds.clearCaches() # Nothing carries over between upcards, so keep memory bounded
+    return bytes(table)
+
+def cardIndex(card):
+    '''Return the table index of a PokerCard (its point value, aces as 11).'''
+    return min(10, card.value) if card.value != 14 else 11
+
+def decide(hand, upcard, table=None, canDouble=None, canSplit=None, canSurrender=False, rules=blackjack.DEFAULT_RULES):
+    '''Return the basic strategy move ('H', 'S', 'D', 'P' or 'R') for a blackjack.Hand
+    against the dealer's upcard (a PokerCard). A drop-in for getMove() for automated
+    players; by default the table is basic strategy for the rules, doubling down is
+    allowed on the first two cards and any pair may be split, but surrendering is not.'''
+    if table is None:
+        table = basicStrategy(odds.INFINITE_DECK, rules)
+    if canDouble is None:
+        canDouble = len(hand) == 2
+    if canSplit is None:
+        canSplit = blackjack.canSplitHand(hand)
+    if canSplit and table[pairIndex(cardIndex(hand[0]), cardIndex(upcard))]:
+        return 'P'
+    action = table[tableIndex(hand.value, hand.isSoft, cardIndex(upcard))]
+    allowed = canDouble if action in (DOUBLE, DOUBLE_OR_STAND) else canSurrender if action >= SURRENDER else True
+    return MOVES[action] if allowed else FALLBACK_MOVES[action]
+
+def printStrategy(table):
+    print('       ' + ''.join(f'{"A" if upcard == 11 else upcard:>3}' for upcard in range(2, 12)))
+    for soft, totals in ((False, range(4, 21)), (True, range(12, 21))):
+        for total in totals:
+            label = f'{"A," + str(total - 11) if soft else total}'
+            print(f'{label:<7}' + ''.join(f'{"SHDdRr"[table[tableIndex(total, soft, upcard)]]:>3}' for upcard in range(2, 12)))
+    for pair in range(2, 12):
+        label = f'{"A" if pair == 11 else pair},{"A" if pair == 11 else pair}'
+        print(f'{label:<7}' + ''.join(f'{"P" if table[pairIndex(pair, upcard)] else "-":>3}' for upcard in range(2, 12)))
+    print('(d = double down if allowed, otherwise stand; R/r = surrender if allowed, otherwise hit/stand;'
+          ' P = split, - = play the total)')
+
+# Classes
+
+class StrategyPlayer(blackjack.Player):
+    '''Headless player for playRound() that always follows a basic strategy table
+    (by default the one for the rules it will be played under).'''
+    def __init__(self, table=None, rules=blackjack.DEFAULT_RULES):
+        self.table = basicStrategy(odds.INFINITE_DECK, rules) if table is None else table
+
+    def move(self, userHand, dealerHand, canDouble, canSplit, canSurrender):
+        return decide(userHand, dealerHand[1], self.table, canDouble, canSplit, canSurrender)
+
+# Main Execution
+
+if __name__ == '__main__':
+    printStrategy(basicStrategy(int(sys.argv[1]) if len(sys.argv) > 1 else odds.INFINITE_DECK))
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+
+''' test_simulate.py -- tests for simulate.py
+    Run with python -m unittest (or pytest).
+'''
+
+import math
+import unittest
+from array import array
+
+import numpy as np
+
+import blackjack
+import simulate
+import strategy
+
+class BatchShuffleTest(unittest.TestCase):
+    def chiSquare(self, size, trials):
+        '''Shuffle range(size) trials times and return the chi-square statistic of the
+        permutation counts and its degrees of freedom (size! - 1).'''
+        rows = simulate.batchShuffle(np.random.default_rng(size), np.arange(size), trials)
+        codes = (rows * size ** np.arange(size)).sum(axis=1)
+        counts = np.unique(codes, return_counts=True)[1]
+        outcomes = math.factorial(size)
+        self.assertEqual(len(counts), outcomes)
+        expected = trials / outcomes
+        return float(((counts - expected) ** 2 / expected).sum()), outcomes - 1
+
+    def test_uniform(self):
+        for size in (3, 4, 5):
+            with self.subTest(size=size):
+                statistic, dof = self.chiSquare(size, 2000 * math.factorial(size))
+                self.assertLess(abs(statistic - dof), 5 * math.sqrt(2 * dof))
+
+    def test_rows_are_permutations(self):
+        rows = simulate.batchShuffle(np.random.default_rng(0), np.arange(52), 100)
+        self.assertTrue((np.sort(rows, axis=1) == np.arange(52)).all())
+
+class PlayBatchTest(unittest.TestCase):
+    def test_matches_play_round(self):
+        # Every lane must deal the same cards to the same hands as playRound() on its shoe
+        for rules in (blackjack.DEFAULT_RULES, blackjack.Rules(surrender=True, hitSoft17=True)):
+            with self.subTest(rules=rules):
+                shoes = simulate.shuffledShoes(np.random.default_rng(7), 2000, rules.numDecks)
+                pointer = np.zeros(len(shoes), dtype=np.intp)
+                net, userTotal, dealerTotal, doubled, split, natural, surrendered = simulate.playBatch(
+                    shoes, simulate.TablePolicy(rules=rules), pointer, rules=rules)
+                player = strategy.StrategyPlayer(rules=rules)
+                deck = blackjack.Shoe(rules.numDecks)
+                for lane, row in enumerate(shoes):
+                    deck.codes = array('B', row.tobytes())
+                    deck.pointer = 0
+                    result = blackjack.playRound(deck, 100, player, rules=rules)
+                    totals = [min(hand.value, 22) for hand in result.userHands]
+                    self.assertEqual(deck.pointer, pointer[lane])
+                    self.assertEqual(totals, userTotal[lane, :len(totals)].tolist())
+                    self.assertEqual(min(result.dealerHand.value, 22), dealerTotal[lane])
+                    self.assertEqual(result.net, net[lane])
+                    self.assertEqual(result.doubled, doubled[lane])
+                    self.assertEqual(len(result.userHands) > 1, split[lane])
+                    self.assertEqual(result.outcomes == ['SURRENDER'], surrendered[lane])
+
+if __name__ == '__main__':
+    unittest.main()